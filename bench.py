@@ -0,0 +1,251 @@
+from time import perf_counter
+import argparse
+import json
+import platform
+import tracemalloc
+from features import FeatureEncoder
+from runner import play_game, random_policy
+from state import *
+
+BENCH_SEED = 314159
+
+####################
+# Position Corpora #
+####################
+def collect_positions(n_games=8, seed=BENCH_SEED, n_player=2, max_per_subphase=200, max_plies=400):
+    '''\
+        Play n_games random games (of up to max_plies plies) from fixed seeds and return
+        {subphase: [encoded position]}, keeping up to max_per_subphase positions of each subphase
+        (spread evenly over the games).
+        Positions are stored as to_bytes() encodings and rebuilt with GameState.from_bytes().
+    '''
+    positions = {subphase: [] for subphase in range(START_PLY, WINNER_CHECK + 1)}
+    for game_index in range(n_games):
+        state = new_game(n_player=n_player, seed=compute_game_seed_sequence(seed, game_index))
+        rng = state.spawn_rng()
+        n_plies = 0
+        while not(state.is_game_over) and (n_plies < max_plies):
+            if (state.subphase == START_PLY):
+                n_plies += 1
+            positions[state.subphase].append(state.to_bytes())
+            legal_actions = state.determine_legal_actions()
+            random_policy(state, legal_actions, rng).enact_consequents()
+
+    for subphase, encodings in positions.items():
+        stride = max(1, len(encodings) // max_per_subphase)
+        positions[subphase] = encodings[::stride][:max_per_subphase]
+    return positions
+
+
+def decode_positions(encodings):
+    return [GameState.from_bytes(data, seed=BENCH_SEED) for data in encodings]
+
+
+def build_payment_scenarios(seed=BENCH_SEED, n_gem_grid=(0, 1, 2, 3), n_joker_grid=(0, 1, 2, 3), card_stride=6):
+    '''\
+        Return a list of (state, card, pid) triples covering a grid of holdings: player 0 holds n_gem
+        tokens of every gem and n_joker jokers, and is asked about every card_stride-th card.
+    '''
+    scenarios = []
+    for n_gem in n_gem_grid:
+        for n_joker in n_joker_grid:
+            state = new_game(n_player=4, seed=seed)
+            for symbol_idx, symbol in enumerate(ALL_TOKEN_SYMBOLS):
+                n_token = n_joker if (symbol == JOKER_STR) else n_gem
+                for token in list(state.token_stacks[SUPPLY_ROW][symbol_idx][:n_token]):
+                    state.set_object_attribute(token, 'cpid', 0)
+            for card_id in range(0, N_CARD, card_stride):
+                scenarios.append((state, state.card_list[card_id], 0))
+    return scenarios
+
+
+##############
+# Benchmarks #
+##############
+def measure(fn, args_list, repeat=3):
+    '''\
+        Call fn(*args) for every args in args_list, repeat times. Returns the best time over the
+        repeats, and the allocation profile of one further (traced, untimed) pass.
+    '''
+    best = None
+    for i in range(repeat):
+        start = perf_counter()
+        for args in args_list:
+            fn(*args)
+        elapsed = perf_counter() - start
+        best = elapsed if (best is None) else min(best, elapsed)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for args in args_list:
+        fn(*args)
+    after = tracemalloc.take_snapshot()
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    net_blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+
+    n_calls = max(1, len(args_list))
+    return {"n_calls": len(args_list),
+            "total_s": best,
+            "per_call_us": 1e6 * best / n_calls,
+            "peak_bytes": peak_bytes,
+            "net_blocks": net_blocks}
+
+
+def bench_legal_actions(positions, repeat):
+    results = {}
+    for subphase, encodings in positions.items():
+        states = decode_positions(encodings)
+        results["determine_legal_actions/" + SUBPHASE_NAMES[subphase]] = measure(GameState.determine_legal_actions, [(state,) for state in states], repeat)
+    return results
+
+
+def bench_payments(repeat):
+    scenarios = build_payment_scenarios()
+    return {"brute_force_ways_to_pay": measure(GameState.brute_force_ways_to_pay, scenarios, repeat),
+            "ways_to_pay": measure(GameState.ways_to_pay, scenarios, repeat)}
+
+
+def bench_purchase_choices(positions, repeat):
+    states = decode_positions(positions[START_PLY])
+    args_list = [(state, state.active_player_idx) for state in states]
+    return {"determine_purchase_choices": measure(GameState.determine_purchase_choices, args_list, repeat)}
+
+
+def bench_sampling(positions, repeat):
+    states = decode_positions(positions[START_PLY])
+    rng = np.random.default_rng(BENCH_SEED)
+    return {"sample_legal_action": measure(GameState.sample_legal_action, [(state, rng) for state in states], repeat)}
+
+
+def bench_token_check(positions, repeat):
+    states = decode_positions(positions[N_TOKEN_CHECK])
+    # The positions which actually require tokens to be returned are the interesting ones.
+    over_limit = [state for state in states if (state.count_tokens_by_pid(state.active_player_idx) > MAX_N_TOKEN_PER_PLAYER)]
+    return {"max_n_token_check_actions": measure(GameState.max_n_token_check_actions, [(state,) for state in states], repeat),
+            "max_n_token_check_actions/over_limit": measure(GameState.max_n_token_check_actions, [(state,) for state in over_limit], repeat)}
+
+
+def bench_feature_encoding(positions, repeat):
+    states = [state for encodings in positions.values() for state in decode_positions(encodings)]
+    encoder = FeatureEncoder(batch_size=len(states))
+    out = encoder.allocate(len(states))
+    result = measure(encoder.encode, [(states, out)], repeat)
+    result["per_state_us"] = result["per_call_us"] / max(1, len(states))
+    return {"encode_features": result}
+
+
+def bench_self_play(n_games, seed, repeat=3):
+    '''\
+        Time n_games games per player count, keeping the best of repeat passes as measure() does.
+        Games are deterministic given (seed, game_index), so every pass plays the same plies.
+    '''
+    results = {}
+    for n_player in (2, 3, 4):
+        # One untimed game, outside the timed range of game indices, so one-time costs (e.g.
+        # building the zobrist keys, cold caches) aren't charged to whichever count runs first.
+        play_game(n_player, seed, n_games)
+        best = None
+        for i in range(repeat):
+            start = perf_counter()
+            n_plies = 0
+            for game_index in range(n_games):
+                n_plies += play_game(n_player, seed, game_index)["n_plies"]
+            elapsed = perf_counter() - start
+            best = elapsed if (best is None) else min(best, elapsed)
+        results["self_play/{}p".format(n_player)] = {"n_games": n_games,
+                                                     "n_plies": n_plies,
+                                                     "total_s": best,
+                                                     "plies_per_second": n_plies / best}
+    return results
+
+
+def run_benchmarks(seed=BENCH_SEED, n_position_games=8, n_self_play_games=10, repeat=3):
+    positions = collect_positions(n_games=n_position_games, seed=seed)
+    results = {}
+    results.update(bench_legal_actions(positions, repeat))
+    results.update(bench_payments(repeat))
+    results.update(bench_purchase_choices(positions, repeat))
+    results.update(bench_token_check(positions, repeat))
+    results.update(bench_sampling(positions, repeat))
+    results.update(bench_feature_encoding(positions, repeat))
+    results.update(bench_self_play(n_self_play_games, seed, repeat))
+    return {"meta": {"seed": seed,
+                     "n_position_games": n_position_games,
+                     "n_self_play_games": n_self_play_games,
+                     "repeat": repeat,
+                     "python": platform.python_version(),
+                     "numpy": np.__version__},
+            "results": results}
+
+
+#############
+# Reporting #
+#############
+# Metrics compared between runs, with whether a larger value is an improvement.
+COMPARED_METRICS = {"per_call_us": False,
+                    "peak_bytes": False,
+                    "net_blocks": False,
+                    "plies_per_second": True}
+
+
+def compare_reports(old_report, new_report):
+    '''\
+        Return a list of (benchmark, metric, old, new, ratio) for every metric present in both
+        reports, where ratio = new / old.
+    '''
+    rows = []
+    for name, new_result in new_report["results"].items():
+        old_result = old_report["results"].get(name)
+        if (old_result is None):
+            continue
+        for metric in COMPARED_METRICS:
+            if (metric in new_result) and (metric in old_result):
+                old_value = old_result[metric]
+                new_value = new_result[metric]
+                ratio = (new_value / old_value) if old_value else float("nan")
+                rows.append((name, metric, old_value, new_value, ratio))
+    return rows
+
+
+def print_report(report):
+    for name, result in report["results"].items():
+        if ("plies_per_second" in result):
+            print("{:<48} {:>12.1f} plies/s".format(name, result["plies_per_second"]))
+        else:
+            print("{:<48} {:>12.1f} us/call {:>12d} peak B {:>8d} blocks".format(name, result["per_call_us"], result["peak_bytes"], result["net_blocks"]))
+
+
+def print_comparison(rows):
+    for name, metric, old_value, new_value, ratio in rows:
+        better = (ratio > 1.0) if COMPARED_METRICS[metric] else (ratio < 1.0)
+        print("{:<48} {:<16} {:>14.1f} -> {:>14.1f}  x{:.3f}{}".format(name, metric, old_value, new_value, ratio, "" if better or (ratio == 1.0) else "  (worse)"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the engine's hot paths.")
+    parser.add_argument("--output", default="bench.json", help="Where to write the JSON report.")
+    parser.add_argument("--compare", default=None, help="A previous JSON report to compare against.")
+    parser.add_argument("--seed", type=int, default=BENCH_SEED)
+    parser.add_argument("--position-games", type=int, default=8)
+    parser.add_argument("--self-play-games", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    report = run_benchmarks(seed=args.seed,
+                            n_position_games=args.position_games,
+                            n_self_play_games=args.self_play_games,
+                            repeat=args.repeat)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+
+    if (args.compare is not None):
+        with open(args.compare) as f:
+            old_report = json.load(f)
+        print()
+        print_comparison(compare_reports(old_report, report))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
+from collections import namedtuple
 import numpy as np
+# Default seed for a GameState's random stream; games never touch NumPy's global RNG.
 RNG_SEED = 112358
-np.random.seed(RNG_SEED)
 
 from tc import *
 from ways_to_pay_aux import *
@@ -12,6 +13,9 @@ MAX_N_NOBLE = 10
 MAX_N_TOKEN = 7
 MAX_N_JOKER = 5
 MAX_N_RESERVED_CARD = 3
+MAX_N_PLAYER = 4
+N_TIER = 3
+N_MARKET_CARD_PER_TIER = 4
 
 ########################
 ### Daemon Constants ###
@@ -30,6 +34,11 @@ NOBLE_CHECK = 1
 N_TOKEN_CHECK = 2
 REFILL_CHECK = 3
 WINNER_CHECK = 4
+SUBPHASE_NAMES = {START_PLY: "START_PLY",
+                  NOBLE_CHECK: "NOBLE_CHECK",
+                  N_TOKEN_CHECK: "N_TOKEN_CHECK",
+                  REFILL_CHECK: "REFILL_CHECK",
+                  WINNER_CHECK: "WINNER_CHECK"}
 
 #####################################
 ### Noble Instantiation Constants ###
@@ -37,58 +46,25 @@ WINNER_CHECK = 4
 N_VP_PER_NOBLE = 3
 
 
-# diamond, emerald,  onyx,    ruby, sapphire
+# Bonus requirements of each noble, in the order of NON_JOKER_TOKEN_SYMBOLS:
 # diamond, sapphire, emerald, ruby, onyx
-
-NOBLE_DIAMOND_IDX = 0
-NOBLE_EMERALD_IDX = 1
-NOBLE_ONYX_IDX = 2
-NOBLE_RUBY_IDX = 3
-NOBLE_SAPPHIRE_IDX = 4
-
-NOBLE_0_SPECS = [0, 4, 0, 4, 0]
-NOBLE_1_SPECS = [3, 0, 3, 3, 0]
-NOBLE_2_SPECS = [4, 0, 0, 0, 4]
-NOBLE_3_SPECS = [4, 0, 4, 0, 0]
-NOBLE_4_SPECS = [0, 4, 0, 0, 4]
-NOBLE_5_SPECS = [0, 3, 0, 3, 3]
-NOBLE_6_SPECS = [3, 3, 0, 0, 3]
-NOBLE_7_SPECS = [0, 0, 4, 4, 0]
-NOBLE_8_SPECS = [3, 0, 3, 0, 3]
-NOBLE_9_SPECS = [0, 3, 3, 3, 0]
-
-OLD_NOBLE_SPECS_LIST = [NOBLE_0_SPECS,
-                        NOBLE_1_SPECS,
-                        NOBLE_2_SPECS,
-                        NOBLE_3_SPECS,
-                        NOBLE_4_SPECS,
-                        NOBLE_5_SPECS,
-                        NOBLE_6_SPECS,
-                        NOBLE_7_SPECS,
-                        NOBLE_8_SPECS,
-                        NOBLE_9_SPECS
-]
-
-def unify_sequencing(source_list):
-    src_list = list(source_list)
-    new_list = []
-    new_list.append(src_list[0])
-    new_list.append(src_list[-1])
-    new_list.append(src_list[1])
-    new_list.append(src_list[-2])
-    new_list.append(src_list[2])
-    return list(new_list)
-
-NOBLE_SPECS_LIST = []
-for old_specs in OLD_NOBLE_SPECS_LIST:
-    NOBLE_SPECS_LIST.append(unify_sequencing(old_specs))
-
 NOBLE_DIAMOND_IDX = 0
 NOBLE_SAPPHIRE_IDX = 1
 NOBLE_EMERALD_IDX = 2
 NOBLE_RUBY_IDX = 3
 NOBLE_ONYX_IDX = 4
 
+NOBLE_SPECS_LIST = [[0, 0, 4, 4, 0],
+                    [3, 0, 0, 3, 3],
+                    [4, 4, 0, 0, 0],
+                    [4, 0, 0, 0, 4],
+                    [0, 4, 4, 0, 0],
+                    [0, 3, 3, 3, 0],
+                    [3, 3, 3, 0, 0],
+                    [0, 0, 0, 4, 4],
+                    [3, 3, 0, 0, 3],
+                    [0, 0, 3, 3, 3]]
+
 ####################################
 ### Card Instantiation Constants ###
 ####################################
@@ -101,6 +77,12 @@ CARD_EMERALD_IDX = 5
 CARD_RUBY_IDX = 6
 CARD_ONYX_IDX = 7
 
+# Card attributes which determine where GameState's card index files a card.
+CARD_INDEX_ATTRS = ('cpid', 'is_reserved', 'is_visible')
+
+# Noble attributes which participate in the zobrist hash of a GameState.
+NOBLE_HASH_ATTRS = ('cpid', 'is_visible')
+
 DIAMOND_STR = 'w'
 SAPPHIRE_STR = 'b'
 EMERALD_STR = 'g'
@@ -118,6 +100,16 @@ JOKER_CSTR = DEF+HIY+'J'+DEF
 
 NON_JOKER_TOKEN_SYMBOLS = ['w', 'b', 'g', 'r', 'o']
 ALL_TOKEN_SYMBOLS = ['w', 'b', 'g', 'r', 'o', 'j']
+N_TOKEN_SYMBOL = len(ALL_TOKEN_SYMBOLS)
+N_NON_JOKER_TOKEN_SYMBOL = len(NON_JOKER_TOKEN_SYMBOLS)
+
+# Column of each symbol in the token bank count matrix, GameState.token_counts.
+TOKEN_SYMBOL_IDX = {symbol: i for i, symbol in enumerate(ALL_TOKEN_SYMBOLS)}
+JOKER_IDX = TOKEN_SYMBOL_IDX[JOKER_STR]
+
+# Row of the token bank count matrix holding the uncontrolled tokens (cpid == -1);
+# the tokens controlled by the player with a given pid live in row (pid + 1).
+SUPPLY_ROW = 0
 ALL_TOKEN_CSYMBOLS = [DIAMOND_CSTR, SAPPHIRE_CSTR, EMERALD_CSTR, RUBY_CSTR, ONYX_CSTR, JOKER_CSTR]
 
 CARD_SPECS_LIST = [[0,'o',0,1,1,1,1,0],
@@ -211,6 +203,71 @@ CARD_SPECS_LIST = [[0,'o',0,1,1,1,1,0],
 [2,'r',4,0,3,6,3,0],
 [2,'r',5,0,0,7,3,0]]
 
+N_CARD = len(CARD_SPECS_LIST)
+
+# Cost matrices, rows indexed by card_id / noble_id, columns in the order of NON_JOKER_TOKEN_SYMBOLS.
+CARD_COST_MATRIX = np.array([card_specs[CARD_DIAMOND_IDX:CARD_ONYX_IDX + 1] for card_specs in CARD_SPECS_LIST], dtype=int)
+CARD_COST_MATRIX.setflags(write=False)
+NOBLE_COST_MATRIX = np.array(NOBLE_SPECS_LIST, dtype=int)
+NOBLE_COST_MATRIX.setflags(write=False)
+
+###################
+### Spec Tables ###
+###################
+# Flyweights: the static data of every card and noble is built once per process, and shared
+# by the Card and Noble objects of every GameState, which hold only their mutable state.
+CardSpec = namedtuple("CardSpec", ("card_id", "spec_list", "tier", "bonus", "victory_points",
+                                   "cost_diamond", "cost_sapphire", "cost_emerald", "cost_ruby", "cost_onyx",
+                                   "bonus_idx", "cost", "cost_vector"))
+NobleSpec = namedtuple("NobleSpec", ("noble_id", "victory_points", "card_cost", "cost_vector"))
+
+CARD_SPECS = tuple(CardSpec(card_id=i,
+                            spec_list=tuple(card_specs),
+                            tier=card_specs[CARD_TIER_IDX],
+                            bonus=card_specs[CARD_BONUS_IDX],
+                            victory_points=card_specs[CARD_VP_IDX],
+                            cost_diamond=card_specs[CARD_DIAMOND_IDX],
+                            cost_sapphire=card_specs[CARD_SAPPHIRE_IDX],
+                            cost_emerald=card_specs[CARD_EMERALD_IDX],
+                            cost_ruby=card_specs[CARD_RUBY_IDX],
+                            cost_onyx=card_specs[CARD_ONYX_IDX],
+                            bonus_idx=TOKEN_SYMBOL_IDX[card_specs[CARD_BONUS_IDX]],
+                            cost=tuple(card_specs[CARD_DIAMOND_IDX:CARD_ONYX_IDX + 1]),
+                            cost_vector=CARD_COST_MATRIX[i])
+                   for i, card_specs in enumerate(CARD_SPECS_LIST))
+NOBLE_SPECS = tuple(NobleSpec(noble_id=i,
+                              victory_points=N_VP_PER_NOBLE,
+                              card_cost=tuple(noble_specs),
+                              cost_vector=NOBLE_COST_MATRIX[i])
+                    for i, noble_specs in enumerate(NOBLE_SPECS_LIST))
+
+##########################
+### Encoding Constants ###
+##########################
+# Layout of GameState.to_bytes(), little-endian, one byte per field unless noted:
+#   n_player, active_player_idx, subphase, is_final_turn | (is_game_over << 1),
+#   tier_to_refill, n_tokens_drawn_this_ply
+#   N_CARD card states, indexed by card_id, a nibble each; see CARD_ENCODING_* below
+#   (MAX_N_PLAYER + 1) x N_TOKEN_SYMBOL token counts, rows indexed by (cpid + 1)
+#   MAX_N_NOBLE noble_ids in the order of GameState.noble_list
+#   MAX_N_NOBLE noble states, indexed by noble_id, a nibble each; see NOBLE_ENCODING_* below
+#   N_TIER deck tail lengths
+# STATE_PREFIX_FORMAT covers the fields above; it is followed by the card_ids of the undealt
+# tail of each tier deck, tiers 0, 1 and 2 concatenated, in deal order. At most
+# struct.calcsize(STATE_PREFIX_FORMAT) + N_CARD bytes, and less as the decks run down.
+STATE_HEADER_FORMAT = "BBBBbB"
+N_CARD_ENCODING_BYTE = (N_CARD + 1) // 2
+N_NOBLE_ENCODING_BYTE = (MAX_N_NOBLE + 1) // 2
+STATE_PREFIX_FORMAT = "<" + STATE_HEADER_FORMAT + "{}B".format(N_CARD_ENCODING_BYTE
+                                                                + (MAX_N_PLAYER + 1) * N_TOKEN_SYMBOL
+                                                                + MAX_N_NOBLE
+                                                                + N_NOBLE_ENCODING_BYTE
+                                                                + N_TIER)
+# Card and noble state nibbles hold (cpid + 1) in the low bits, then their flag.
+OWNER_ENCODING_MASK = 0b111
+CARD_ENCODING_RESERVED_BIT = 0b1000
+NOBLE_ENCODING_VISIBLE_BIT = 0b1000
+
 # VP_PER_TIER
 #   0 = 5 * 1 = 5
 #   1 = 5 * (11) = 55
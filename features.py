@@ -0,0 +1,269 @@
+from state import *
+
+#####################
+# Spec Feature Rows #
+#####################
+# A card is described by its tier (one-hot), bonus (one-hot), victory points and cost vector;
+# a noble by its cost vector and victory points. The rows are built once from the spec tables,
+# so encoding a position only gathers rows by id. The last row of each table is all zeros and
+# stands for an empty slot.
+CARD_FEATURE_WIDTH = N_TIER + N_NON_JOKER_TOKEN_SYMBOL + 1 + N_NON_JOKER_TOKEN_SYMBOL
+NOBLE_FEATURE_WIDTH = N_NON_JOKER_TOKEN_SYMBOL + 1
+EMPTY_CARD_ROW = N_CARD
+EMPTY_NOBLE_ROW = MAX_N_NOBLE
+
+
+def build_card_feature_table():
+    table = np.zeros((N_CARD + 1, CARD_FEATURE_WIDTH), dtype=np.float32)
+    for spec in CARD_SPECS:
+        row = table[spec.card_id]
+        row[spec.tier] = 1
+        row[N_TIER + spec.bonus_idx] = 1
+        row[N_TIER + N_NON_JOKER_TOKEN_SYMBOL] = spec.victory_points
+        row[N_TIER + N_NON_JOKER_TOKEN_SYMBOL + 1:] = spec.cost
+    table.setflags(write=False)
+    return table
+
+
+def build_noble_feature_table():
+    table = np.zeros((MAX_N_NOBLE + 1, NOBLE_FEATURE_WIDTH), dtype=np.float32)
+    for spec in NOBLE_SPECS:
+        table[spec.noble_id, :N_NON_JOKER_TOKEN_SYMBOL] = spec.card_cost
+        table[spec.noble_id, N_NON_JOKER_TOKEN_SYMBOL] = spec.victory_points
+    table.setflags(write=False)
+    return table
+
+
+CARD_FEATURES = build_card_feature_table()
+NOBLE_FEATURES = build_noble_feature_table()
+CARD_VICTORY_POINTS = tuple(spec.victory_points for spec in CARD_SPECS)
+
+##################
+# Feature Layout #
+##################
+N_MARKET_SLOT = N_TIER * N_MARKET_CARD_PER_TIER
+N_NOBLE_SLOT = compute_n_noble(MAX_N_PLAYER)
+
+# (name, n_slot, slot_width) in the order the features are laid out. Per-player blocks have
+# one slot per seat counted from the active player: seat 0 is the player to move, seat 1 the
+# next one, and so on; seats beyond n_player are zero.
+FEATURE_BLOCKS = (("subphase",                  1, len(SUBPHASE_NAMES)),
+                  ("is_final_turn",             1, 1),
+                  ("tier_to_refill",            1, N_TIER + 1),
+                  ("n_tokens_drawn_this_ply",   1, 1),
+                  ("supply_tokens",             1, N_TOKEN_SYMBOL),
+                  ("deck_sizes",                1, N_TIER),
+                  ("market_cards",              N_MARKET_SLOT, CARD_FEATURE_WIDTH),
+                  ("nobles",                    N_NOBLE_SLOT, NOBLE_FEATURE_WIDTH),
+                  ("seat_is_occupied",          1, MAX_N_PLAYER),
+                  ("seat_tokens",               MAX_N_PLAYER, N_TOKEN_SYMBOL),
+                  ("seat_bonuses",              MAX_N_PLAYER, N_NON_JOKER_TOKEN_SYMBOL),
+                  ("seat_victory_points",       1, MAX_N_PLAYER),
+                  ("seat_n_purchased_cards",    1, MAX_N_PLAYER),
+                  ("seat_reserved_cards",       MAX_N_PLAYER * MAX_N_RESERVED_CARD, CARD_FEATURE_WIDTH))
+
+
+def build_feature_layout():
+    ''' Return ({name: slice of the feature vector}, total number of features). '''
+    layout = {}
+    offset = 0
+    for name, n_slot, slot_width in FEATURE_BLOCKS:
+        layout[name] = slice(offset, offset + n_slot * slot_width)
+        offset += n_slot * slot_width
+    return layout, offset
+
+
+FEATURE_LAYOUT, N_FEATURE = build_feature_layout()
+
+# SEAT_PIDS[n_player][active_player_idx][seat] is the pid sitting at seat.
+SEAT_PIDS = {n_player: [tuple((active + seat) % n_player for seat in range(n_player)) for active in range(n_player)]
+             for n_player in range(1, MAX_N_PLAYER + 1)}
+SEAT_IS_OCCUPIED = {n_player: [1] * n_player + [0] * (MAX_N_PLAYER - n_player) for n_player in range(1, MAX_N_PLAYER + 1)}
+EMPTY_SEAT_TOKENS = [[0] * N_TOKEN_SYMBOL] * MAX_N_PLAYER
+EMPTY_SEAT_BONUSES = [[0] * N_NON_JOKER_TOKEN_SYMBOL] * MAX_N_PLAYER
+
+#####################
+# Position Encoding #
+#####################
+class FeatureEncoder(Base):
+    '''\
+        Encodes GameStates into rows of a float32 array laid out by FEATURE_LAYOUT, N_FEATURE wide.
+
+        Each position is described as a whole (hidden cards reserved blind included), as seen
+        by the player to move. The only per-position Python work is reading ids and counts off
+        the state into preallocated integer scratch arrays; the feature rows of cards and
+        nobles are then gathered from CARD_FEATURES and NOBLE_FEATURES for the whole batch at
+        once, straight into the output buffer.
+
+        batch_size      <int>       Number of positions encoded per pass, i.e. the size of the
+                                    scratch arrays. Longer lists of states are encoded in chunks.
+    '''
+    def __init__(self, batch_size=4096, **kwargs):
+        super().__init__(**kwargs)
+        self.batch_size = batch_size
+        self.rows = np.arange(batch_size)
+        # subphase, tier_to_refill + 1, is_final_turn, n_tokens_drawn_this_ply
+        self.headers = np.zeros((batch_size, 4), dtype=int)
+        self.supply_tokens = np.zeros((batch_size, N_TOKEN_SYMBOL), dtype=int)
+        self.deck_sizes = np.zeros((batch_size, N_TIER), dtype=int)
+        self.market_ids = np.zeros((batch_size, N_MARKET_SLOT), dtype=int)
+        self.noble_ids = np.zeros((batch_size, N_NOBLE_SLOT), dtype=int)
+        self.seat_is_occupied = np.zeros((batch_size, MAX_N_PLAYER), dtype=int)
+        self.seat_tokens = np.zeros((batch_size, MAX_N_PLAYER, N_TOKEN_SYMBOL), dtype=int)
+        self.seat_bonuses = np.zeros((batch_size, MAX_N_PLAYER, N_NON_JOKER_TOKEN_SYMBOL), dtype=int)
+        self.seat_victory_points = np.zeros((batch_size, MAX_N_PLAYER), dtype=int)
+        self.seat_n_purchased_cards = np.zeros((batch_size, MAX_N_PLAYER), dtype=int)
+        self.reserved_ids = np.zeros((batch_size, MAX_N_PLAYER * MAX_N_RESERVED_CARD), dtype=int)
+
+    def allocate(self, n_states):
+        ''' Return a zeroed buffer for n_states positions. '''
+        return np.zeros((n_states, N_FEATURE), dtype=np.float32)
+
+    def encode(self, states, out):
+        '''\
+            Write the features of states[i] into out[i] and return out[:len(states)].
+
+            states  <Sequence[GameState]>
+            out     <np.ndarray[float32]>   C-contiguous buffer of shape (>= len(states), N_FEATURE),
+                                            e.g. from allocate(). Rows past len(states) are untouched.
+        '''
+        if (out.ndim != 2) or (out.shape[0] < len(states)) or (out.shape[1] != N_FEATURE):
+            raise ValueError("out has shape {}, needs ({}+, {})".format(out.shape, len(states), N_FEATURE))
+        if (out.dtype != np.float32) or not(out.flags.c_contiguous):
+            raise ValueError("out must be a C-contiguous float32 array")
+        for start in range(0, len(states), self.batch_size):
+            chunk = states[start:start + self.batch_size]
+            self.gather(chunk)
+            self.scatter(out[start:start + len(chunk)])
+        return out[:len(states)]
+
+    def encode_state(self, state, out=None):
+        ''' Encode a single position into out (a length N_FEATURE float32 array), or a new one. '''
+        if (out is None):
+            out = np.zeros(N_FEATURE, dtype=np.float32)
+        self.encode([state], out.reshape(1, N_FEATURE))
+        return out
+
+    def gather(self, states):
+        '''\
+            Read the ids and counts describing each of states into the scratch arrays. Rows are
+            assembled as Python lists, which is much cheaper than writing NumPy elements one at
+            a time, and converted into the scratch arrays in one assignment per array.
+        '''
+        headers = []
+        supply_tokens = []
+        deck_sizes = []
+        market_ids = []
+        noble_ids = []
+        seat_is_occupied = []
+        seat_tokens = []
+        seat_bonuses = []
+        seat_victory_points = []
+        seat_n_purchased_cards = []
+        reserved_ids = []
+
+        for state in states:
+            n_player = state.n_player
+            active_player_idx = state.active_player_idx
+            headers.append((state.subphase, state.tier_to_refill + 1, state.is_final_turn, state.n_tokens_drawn_this_ply))
+            token_rows = state.token_counts.tolist()
+            bonus_rows = state.bonus_counts.tolist()
+            supply_tokens.append(token_rows[SUPPLY_ROW])
+            # As count_deck_cards(), for every tier.
+            deck_sizes.append([len(order) - cursor for order, cursor in zip(state.deck_order, state.deck_cursor)])
+
+            state_market_ids = []
+            for tier_cards in state.market_cards:
+                state_market_ids.extend(tier_cards)
+                state_market_ids.extend([EMPTY_CARD_ROW] * (N_MARKET_CARD_PER_TIER - len(tier_cards)))
+            market_ids.append(state_market_ids)
+
+            victory_points = [0] * MAX_N_PLAYER
+            state_noble_ids = []
+            for noble in state.noble_list:
+                if (noble.cpid != -1):
+                    victory_points[(noble.cpid - active_player_idx) % n_player] += noble.victory_points
+                elif noble.is_visible:
+                    state_noble_ids.append(noble.noble_id)
+            state_noble_ids.sort()
+            state_noble_ids.extend([EMPTY_NOBLE_ROW] * (N_NOBLE_SLOT - len(state_noble_ids)))
+            noble_ids.append(state_noble_ids)
+
+            seat_pids = SEAT_PIDS[n_player][active_player_idx]
+            n_empty_seat = MAX_N_PLAYER - n_player
+            seat_is_occupied.append(SEAT_IS_OCCUPIED[n_player])
+            seat_tokens.append([token_rows[pid + 1] for pid in seat_pids] + EMPTY_SEAT_TOKENS[:n_empty_seat])
+            seat_bonuses.append([bonus_rows[pid] for pid in seat_pids] + EMPTY_SEAT_BONUSES[:n_empty_seat])
+            n_purchased_cards = [0] * MAX_N_PLAYER
+            state_reserved_ids = []
+            for seat, pid in enumerate(seat_pids):
+                # As tally_victory_points(), without materialising the cards and nobles.
+                purchased_ids = state.purchased_cards[pid]
+                victory_points[seat] += sum(map(CARD_VICTORY_POINTS.__getitem__, purchased_ids))
+                n_purchased_cards[seat] = len(purchased_ids)
+                player_reserved_ids = state.reserved_cards[pid]
+                state_reserved_ids.extend(player_reserved_ids)
+                state_reserved_ids.extend([EMPTY_CARD_ROW] * (MAX_N_RESERVED_CARD - len(player_reserved_ids)))
+            state_reserved_ids.extend([EMPTY_CARD_ROW] * (n_empty_seat * MAX_N_RESERVED_CARD))
+            seat_victory_points.append(victory_points)
+            seat_n_purchased_cards.append(n_purchased_cards)
+            reserved_ids.append(state_reserved_ids)
+
+        n_states = len(states)
+        self.headers[:n_states] = headers
+        self.supply_tokens[:n_states] = supply_tokens
+        self.deck_sizes[:n_states] = deck_sizes
+        self.market_ids[:n_states] = market_ids
+        self.noble_ids[:n_states] = noble_ids
+        self.seat_is_occupied[:n_states] = seat_is_occupied
+        self.seat_tokens[:n_states] = seat_tokens
+        self.seat_bonuses[:n_states] = seat_bonuses
+        self.seat_victory_points[:n_states] = seat_victory_points
+        self.seat_n_purchased_cards[:n_states] = seat_n_purchased_cards
+        self.reserved_ids[:n_states] = reserved_ids
+
+    def scatter(self, out):
+        ''' Write the features held in the scratch arrays into out, one row per gathered state. '''
+        n_states = out.shape[0]
+        rows = self.rows[:n_states]
+        self.write_one_hot(out, "subphase", rows, self.headers[:n_states, 0])
+        self.write_one_hot(out, "tier_to_refill", rows, self.headers[:n_states, 1])
+        out[:, FEATURE_LAYOUT["is_final_turn"]] = self.headers[:n_states, 2:3]
+        out[:, FEATURE_LAYOUT["n_tokens_drawn_this_ply"]] = self.headers[:n_states, 3:4]
+        out[:, FEATURE_LAYOUT["supply_tokens"]] = self.supply_tokens[:n_states]
+        out[:, FEATURE_LAYOUT["deck_sizes"]] = self.deck_sizes[:n_states]
+        np.take(CARD_FEATURES, self.market_ids[:n_states], axis=0, out=self.block_view(out, "market_cards"), mode="clip")
+        np.take(NOBLE_FEATURES, self.noble_ids[:n_states], axis=0, out=self.block_view(out, "nobles"), mode="clip")
+        out[:, FEATURE_LAYOUT["seat_is_occupied"]] = self.seat_is_occupied[:n_states]
+        self.block_view(out, "seat_tokens")[:] = self.seat_tokens[:n_states]
+        self.block_view(out, "seat_bonuses")[:] = self.seat_bonuses[:n_states]
+        out[:, FEATURE_LAYOUT["seat_victory_points"]] = self.seat_victory_points[:n_states]
+        out[:, FEATURE_LAYOUT["seat_n_purchased_cards"]] = self.seat_n_purchased_cards[:n_states]
+        np.take(CARD_FEATURES, self.reserved_ids[:n_states], axis=0, out=self.block_view(out, "seat_reserved_cards"), mode="clip")
+
+    def write_one_hot(self, out, name, rows, indices):
+        block = FEATURE_LAYOUT[name]
+        out[:, block] = 0
+        out[rows, block.start + indices] = 1
+
+    def block_view(self, out, name):
+        ''' View of the named block of out as (n_states, n_slot, slot_width), sharing its memory. '''
+        for block_name, n_slot, slot_width in FEATURE_BLOCKS:
+            if (block_name == name):
+                view = out[:, FEATURE_LAYOUT[name]]
+                # Assigning the shape (rather than reshape()) raises instead of silently copying.
+                view.shape = (out.shape[0], n_slot, slot_width)
+                return view
+        raise KeyError(name)
+
+
+def encode_states(states, out=None, encoder=None):
+    '''\
+        Encode states into out (see FeatureEncoder.encode()), allocating a buffer only if none is
+        given. Reuse an encoder across calls to reuse its scratch arrays too.
+    '''
+    if (encoder is None):
+        encoder = FeatureEncoder(batch_size=max(1, min(len(states), 4096)))
+    if (out is None):
+        out = encoder.allocate(len(states))
+    return encoder.encode(states, out)
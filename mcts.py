@@ -0,0 +1,244 @@
+from math import log, sqrt
+from time import perf_counter
+from state import *
+
+##################################
+# Monte Carlo Tree Search Engine #
+##################################
+class MCTSNode(Base):
+    '''\
+        A decision point of the search tree.
+
+        parent          <MCTSNode>          None for the root.
+
+        action          <Action>            The choice that leads here from the parent, followed by
+                                            any forced daemon actions.
+
+        to_move         <int>               active_player_idx of the position, i.e. who chooses
+                                            among the children.
+
+        key             <int>               zobrist_hash of the position.
+
+        children        <List[MCTSNode]>    Expanded children.
+
+        untried_actions <List[Action]>      Legal actions not yet expanded; None until the node
+                                            is first visited.
+
+        n_visits        <int>               Number of iterations passing through this node.
+
+        total_rewards   <List[float]>       Per pid, the sum of rewards backed up through this node.
+    '''
+    def __init__(self, parent, action, to_move, key, n_player, **kwargs):
+        super().__init__(**kwargs)
+        self.parent = parent
+        self.action = action
+        self.to_move = to_move
+        self.key = key
+        self.children = []
+        self.untried_actions = None
+        self.n_visits = 0
+        self.total_rewards = [0.0] * n_player
+
+
+class MCTS(Base):
+    '''\
+        UCT search over the subphase/action model of a single GameState.
+
+        The search walks the state itself with apply()/undo(), so nothing is copied and the
+        state is back where it started when search() returns.
+
+        Daemon subphases (NOBLE_CHECK, N_TOKEN_CHECK, REFILL_CHECK, WINNER_CHECK) offering a single
+        legal action are forced, and are applied as part of the edge leading to a node rather than
+        being given nodes of their own; a search started at a forced subphase applies them before
+        reaching the root. Daemon subphases offering a real choice (e.g. which tokens
+        to discard) are ordinary decision points.
+
+        state               <GameState>     The state to search from.
+
+        exploration         <float>         UCT exploration constant.
+
+        rollout_policy      <policy>        Move policy for playouts, called as in runner.py. None
+                                            (the default) plays uniformly random moves drawn with
+                                            state.sample_legal_action(), which doesn't enumerate
+                                            the legal actions.
+
+        rollout_max_plies   <int>           Playouts stopping short of the end of the game are
+                                            scored on the position they reach.
+
+        rng                 <Generator>     Random stream; spawned from the state by default.
+    '''
+    def __init__(self,
+                 state,
+                 exploration=sqrt(2),
+                 rollout_policy=None,
+                 rollout_max_plies=200,
+                 rng=None,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.state = state
+        self.exploration = exploration
+        self.rollout_policy = rollout_policy
+        self.rollout_max_plies = rollout_max_plies
+        self.rng = state.spawn_rng() if (rng is None) else rng
+        self.root = None
+        self.n_applied = 0
+
+    def new_node(self, parent, action):
+        return MCTSNode(parent=parent,
+                        action=action,
+                        to_move=self.state.active_player_idx,
+                        key=self.state.zobrist_hash,
+                        n_player=self.state.n_player)
+
+    def apply(self, action):
+        self.state.apply(action)
+        self.n_applied += 1
+
+    def apply_forced_actions(self):
+        '''\
+            Apply daemon actions while they are forced; return the legal actions at the
+            resulting decision point.
+        '''
+        legal_actions = self.state.determine_legal_actions()
+        while (len(legal_actions) == 1) and (self.state.subphase != START_PLY):
+            self.apply(legal_actions[0])
+            legal_actions = self.state.determine_legal_actions()
+        return legal_actions
+
+    def select_child(self, node):
+        ''' UCT from the perspective of the player choosing at node. '''
+        log_n_visits = log(node.n_visits)
+        best_child = None
+        best_score = -1.0
+        for child in node.children:
+            score = (child.total_rewards[node.to_move] / child.n_visits) + self.exploration * sqrt(log_n_visits / child.n_visits)
+            if (score > best_score):
+                best_child = child
+                best_score = score
+        return best_child
+
+    def rollout(self):
+        n_plies = 0
+        while not(self.state.is_game_over) and (n_plies < self.rollout_max_plies):
+            if (self.state.subphase == START_PLY):
+                n_plies += 1
+            if (self.rollout_policy is None):
+                self.apply(self.state.sample_legal_action(self.rng))
+            else:
+                legal_actions = self.state.determine_legal_actions()
+                self.apply(self.rollout_policy(self.state, legal_actions, self.rng))
+
+    def evaluate(self):
+        ''' Reward per pid: a share of 1 for each winner, or for each leader of an unfinished game. '''
+        rewards = [0.0] * self.state.n_player
+        winning_pids = self.state.determine_winner()
+        for pid in winning_pids:
+            rewards[pid] = 1.0 / len(winning_pids)
+        return rewards
+
+    def play_forced_actions(self):
+        '''\
+            Enact the forced daemon actions following the current position for good. Inside an
+            apply() of the caller's, their changes join that apply()'s record, so a single undo()
+            still reverts the whole move.
+        '''
+        legal_actions = self.state.determine_legal_actions()
+        while (len(legal_actions) == 1) and (self.state.subphase != START_PLY):
+            legal_actions[0].enact_consequents()
+            legal_actions = self.state.determine_legal_actions()
+
+    def ensure_root(self):
+        '''\
+            Like every other node, the root stands for the decision point reached once the forced
+            daemon actions have been applied, so its to_move and key are those of that position.
+        '''
+        self.n_applied = 0
+        if not(self.state.is_game_over):
+            self.apply_forced_actions()
+        if (self.root is None) or (self.root.key != self.state.zobrist_hash):
+            self.root = self.new_node(parent=None, action=None)
+        for i in range(self.n_applied):
+            self.state.undo()
+
+    def iterate(self):
+        ''' One selection, expansion, rollout and backpropagation pass. '''
+        self.n_applied = 0
+        node = self.root
+        # The forced prefix leading to the root's decision point.
+        if not(self.state.is_game_over):
+            self.apply_forced_actions()
+
+        # Selection
+        while (node.untried_actions is not None) and not(node.untried_actions) and node.children:
+            node = self.select_child(node)
+            self.apply(node.action)
+            self.apply_forced_actions()
+
+        # Expansion
+        if (node.untried_actions is None):
+            node.untried_actions = self.apply_forced_actions() if not(self.state.is_game_over) else []
+        if node.untried_actions:
+            action = node.untried_actions.pop(self.rng.integers(len(node.untried_actions)))
+            self.apply(action)
+            self.apply_forced_actions()
+            child = self.new_node(parent=node, action=action)
+            node.children.append(child)
+            node = child
+
+        # Simulation
+        self.rollout()
+        rewards = self.evaluate()
+
+        # Backpropagation
+        while (node is not None):
+            node.n_visits += 1
+            for pid in range(len(rewards)):
+                node.total_rewards[pid] += rewards[pid]
+            node = node.parent
+
+        for i in range(self.n_applied):
+            self.state.undo()
+
+    def search(self, n_iterations=None, time_budget=None):
+        '''\
+            Search from the current position of the state for n_iterations iterations and/or
+            time_budget seconds, whichever runs out first (at least one must be given).
+            Returns a dict mapping each root Action to its visit count.
+        '''
+        if (n_iterations is None) and (time_budget is None):
+            raise ValueError("search() needs n_iterations or time_budget")
+        self.ensure_root()
+        deadline = None if (time_budget is None) else (perf_counter() + time_budget)
+        n_done = 0
+        while ((n_iterations is None) or (n_done < n_iterations)) and ((deadline is None) or (perf_counter() < deadline)):
+            self.iterate()
+            n_done += 1
+        return {child.action: child.n_visits for child in self.root.children}
+
+    def best_action(self):
+        ''' The most visited root Action, or None before any search. '''
+        if (self.root is None) or not(self.root.children):
+            return None
+        return max(self.root.children, key=lambda child: child.n_visits).action
+
+    def advance(self, action):
+        '''\
+            Tell the engine action has been played on the state, e.g. with state.apply(action)
+            or action.enact_consequents(). The forced daemon actions following it which haven't
+            been played yet are played here, so the state reaches the decision point the next
+            best_action() is chosen for. The subtree below action becomes the new root, so the
+            statistics gathered for it are kept for the next search().
+        '''
+        self.play_forced_actions()
+        next_root = None
+        if (self.root is not None):
+            for child in self.root.children:
+                if (child.action is action):
+                    next_root = child
+                    break
+        if (next_root is not None) and (next_root.key == self.state.zobrist_hash):
+            next_root.parent = None
+            next_root.action = None
+            self.root = next_root
+        else:
+            self.root = None
@@ -1,9 +1,13 @@
+from operator import attrgetter
 from constants import *
 
 ################################################
 # Default Base Class to facilitate subclassing #
 ################################################
 class Base:
+    # Empty so that subclasses declaring __slots__ really are free of a per-instance __dict__.
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         for kwarg in kwargs:
             setattr(self, kwarg, kwargs[kwarg])
@@ -59,8 +63,12 @@ class GameObject(Base):
                                             victory_points;
                                             bonuses for Noble visits;
                                             bonuses for apparent_cost_analysis().
-                                        
+
+        Game objects hold only this mutable state (in __slots__); static data lives in the shared
+        spec tables of constants.py.
     '''
+    __slots__ = ("is_visible", "cpid")
+
     def __init__(self,
                  is_visible,
                  cpid,
@@ -76,7 +84,12 @@ class Card(GameObject):
 
         card_id             <int>                       Ordinal index into CARD_SPECS_LIST
 
-        card_spec_list      <List[Union[Str, Int]]>     constants.py contains a list named CARD_SPECS_LIST.
+        spec                <CardSpec>                  CARD_SPECS[card_id], the static data of the card shared by
+                                                        every game. tier, bonus, victory_points, cost_<gem>,
+                                                        bonus_idx, cost, cost_vector and card_spec_list are read-only
+                                                        views of it.
+
+        card_spec_list      <Tuple[Union[Str, Int]]>    constants.py contains a list named CARD_SPECS_LIST.
                                                         Each element of CARD_SPECS_LIST is a sublist of the form:
                                                         list[0]    <int in [0:2]>
                                                                    representing the tier deck the card belongs to
@@ -93,23 +106,38 @@ class Card(GameObject):
         is_reserved         <bool>                      Flag indicating reservation status of the card.
 
         is_purchased        <bool>                      Flag indicating purchse status of the card.
+
+        bonus_idx           <int>                       Position of the bonus in NON_JOKER_TOKEN_SYMBOLS.
+
+        cost                <Tuple[int]>                The cost components in the order of
+                                                        NON_JOKER_TOKEN_SYMBOLS, i.e. list[3:7].
+
+        cost_vector         <np.ndarray[int]>           The cost components in the order of
+                                                        NON_JOKER_TOKEN_SYMBOLS, i.e. list[3:7];
+                                                        a read-only row of CARD_COST_MATRIX.
     '''
+    __slots__ = ("spec", "is_reserved", "is_purchased")
+
+    card_id = property(attrgetter("spec.card_id"))
+    card_spec_list = property(attrgetter("spec.spec_list"))
+    tier = property(attrgetter("spec.tier"))
+    bonus = property(attrgetter("spec.bonus"))
+    victory_points = property(attrgetter("spec.victory_points"))
+    cost_diamond = property(attrgetter("spec.cost_diamond"))
+    cost_sapphire = property(attrgetter("spec.cost_sapphire"))
+    cost_emerald = property(attrgetter("spec.cost_emerald"))
+    cost_ruby = property(attrgetter("spec.cost_ruby"))
+    cost_onyx = property(attrgetter("spec.cost_onyx"))
+    bonus_idx = property(attrgetter("spec.bonus_idx"))
+    cost = property(attrgetter("spec.cost"))
+    cost_vector = property(attrgetter("spec.cost_vector"))
+
     def __init__(self,
                  card_id,
-                 card_spec_list,
                  is_reserved=False,
                  is_purchased=False,
                  **kwargs):
-        self.card_id = card_id
-        self.card_spec_list = list(card_spec_list)
-        self.tier = self.card_spec_list[CARD_TIER_IDX]
-        self.bonus = self.card_spec_list[CARD_BONUS_IDX]
-        self.victory_points = self.card_spec_list[CARD_VP_IDX]
-        self.cost_diamond = self.card_spec_list[CARD_DIAMOND_IDX]
-        self.cost_sapphire = self.card_spec_list[CARD_SAPPHIRE_IDX]
-        self.cost_emerald = self.card_spec_list[CARD_EMERALD_IDX]
-        self.cost_ruby = self.card_spec_list[CARD_RUBY_IDX]
-        self.cost_onyx = self.card_spec_list[CARD_ONYX_IDX]
+        self.spec = CARD_SPECS[card_id]
         self.is_reserved = is_reserved
         self.is_purchased = is_purchased
         super().__init__(is_visible=False, cpid=-1, **kwargs)
@@ -164,17 +192,27 @@ class Noble(GameObject):
     '''\
         Noble objects.
 
-        victory_points  <int>   number of victory points a Noble contributes to the player they visit.
-        card_cost
+        noble_id        <int>           Ordinal index into NOBLE_SPECS_LIST.
+
+        spec            <NobleSpec>     NOBLE_SPECS[noble_id], shared by every game; victory_points,
+                                        card_cost and cost_vector are read-only views of it.
+
+        victory_points  <int>           number of victory points a Noble contributes to the player they visit.
+
+        card_cost       <Tuple[int]>    number of card bonuses of each gem, in the order of
+                                        NON_JOKER_TOKEN_SYMBOLS, required for a visit.
     '''
+    __slots__ = ("spec",)
+
+    noble_id = property(attrgetter("spec.noble_id"))
+    victory_points = property(attrgetter("spec.victory_points"))
+    card_cost = property(attrgetter("spec.card_cost"))
+    cost_vector = property(attrgetter("spec.cost_vector"))
+
     def __init__(self,
                  noble_id,
-                 victory_points,
-                 card_cost,
                  **kwargs):
-        self.noble_id = noble_id
-        self.victory_points = victory_points
-        self.card_cost = card_cost
+        self.spec = NOBLE_SPECS[noble_id]
         super().__init__(is_visible=False, cpid=-1, **kwargs)
 
     def convert_card_cost_to_string(self):
@@ -200,9 +238,16 @@ class Token(GameObject):
         symbol  <str in ALL_TOKEN_SYMBOLS>  Facilitates inferences about costs and bonuses by providing
                                             a string to participate in combinatorics functions.
                                             This symbol is also used by card.card_spec_list.
+
+        symbol and cstr are class attributes of each subclass, so a Token instance holds nothing
+        but its GameObject state.
     '''
+    __slots__ = ()
+
+    symbol = None
+    cstr = ""
+
     def __init__(self, **kwargs):
-        self.cstr = ""
         super().__init__(is_visible=False, cpid=-1, **kwargs)
 
     def __repr__(self):
@@ -210,42 +255,36 @@ class Token(GameObject):
 
 
 class Joker(Token):
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.symbol = JOKER_STR
-        self.cstr = JOKER_CSTR
+    __slots__ = ()
+    symbol = JOKER_STR
+    cstr = JOKER_CSTR
 
 
 class Onyx(Token):
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.symbol = ONYX_STR
-        self.cstr = ONYX_CSTR
+    __slots__ = ()
+    symbol = ONYX_STR
+    cstr = ONYX_CSTR
 
 
 class Emerald(Token):
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.symbol = EMERALD_STR
-        self.cstr = EMERALD_CSTR
+    __slots__ = ()
+    symbol = EMERALD_STR
+    cstr = EMERALD_CSTR
 
 
 class Sapphire(Token):
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.symbol = SAPPHIRE_STR
-        self.cstr = SAPPHIRE_CSTR
+    __slots__ = ()
+    symbol = SAPPHIRE_STR
+    cstr = SAPPHIRE_CSTR
 
 
 class Ruby(Token):
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.symbol = RUBY_STR
-        self.cstr = RUBY_CSTR
+    __slots__ = ()
+    symbol = RUBY_STR
+    cstr = RUBY_CSTR
 
 
 class Diamond(Token):
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.symbol = DIAMOND_STR
-        self.cstr = DIAMOND_CSTR
+    __slots__ = ()
+    symbol = DIAMOND_STR
+    cstr = DIAMOND_CSTR
@@ -0,0 +1,116 @@
+from collections import Counter
+from time import perf_counter
+import argparse
+from state import *
+
+###########################
+# Game Tree Node Counting #
+###########################
+# Every Action, daemon ones included, is one step of depth: the tree walked is exactly the one
+# determine_legal_actions() and apply()/undo() define.
+def action_label(action):
+    ''' Short description of action identifying it among its siblings, for divide output. '''
+    if isinstance(action, (TokenDraw, ReturnTokensAction)):
+        return "{} {}".format(action.action_type, "".join(action.symbols))
+    elif isinstance(action, ReserveCard):
+        return "{} #{}".format(action.action_type, action.ref_card.card_id)
+    elif isinstance(action, PurchaseCard):
+        return "{} #{} {}".format(action.action_type, action.ref_card.card_id, "".join(action.way_to_pay))
+    elif isinstance(action, AttainNoble):
+        return "{} #{}".format(action.action_type, action.ref_noble.noble_id)
+    elif isinstance(action, RefillAction):
+        return "{} tier {}".format(action.action_type, action.ref_tier)
+    return action.action_type
+
+
+def perft(state, depth, divide=False, generate=GameState.determine_legal_actions):
+    '''\
+        Walk every sequence of legal actions of length depth from the current position of state,
+        applying and undoing them; state is left as it was found.
+
+        state       <GameState>                 Position to count from.
+        depth       <int>                       Number of actions to look ahead.
+        divide      <bool>                      Also count the leaves below each root action.
+        generate    <Callable[[GameState], List[Action]]>
+                                                Move generator under test; a faster generator can be
+                                                validated by comparing its counts with the default's.
+
+        Returns a dict with
+            nodes_by_depth      nodes_by_depth[d] is the number of positions d actions deep, for
+                                d in 0..depth. A finished game has no children.
+            types_by_depth      types_by_depth[d] counts the actions leading to those positions by
+                                action_type (types_by_depth[0] is empty).
+            divide              {action_label: leaves below it} per root action, if asked for.
+            elapsed_s, nodes_per_second
+    '''
+    nodes_by_depth = [0] * (depth + 1)
+    types_by_depth = [Counter() for d in range(depth + 1)]
+    start_hash = state.zobrist_hash
+
+    def walk(current_depth):
+        nodes_by_depth[current_depth] += 1
+        if (current_depth == depth):
+            return 1
+        n_leaves = 0
+        for action in generate(state):
+            types_by_depth[current_depth + 1][action.action_type] += 1
+            state.apply(action)
+            n_leaves += walk(current_depth + 1)
+            state.undo()
+        return n_leaves
+
+    start = perf_counter()
+    divide_counts = {}
+    nodes_by_depth[0] += 1
+    if depth:
+        for action in generate(state):
+            types_by_depth[1][action.action_type] += 1
+            state.apply(action)
+            n_leaves = walk(1)
+            state.undo()
+            if divide:
+                label = action_label(action)
+                divide_counts[label] = divide_counts.get(label, 0) + n_leaves
+    elapsed = perf_counter() - start
+
+    if (state.zobrist_hash != start_hash):
+        raise RuntimeError("perft() did not restore the position it started from")
+
+    n_nodes = sum(nodes_by_depth)
+    result = {"nodes_by_depth": nodes_by_depth,
+              "types_by_depth": [dict(types) for types in types_by_depth],
+              "elapsed_s": elapsed,
+              "nodes_per_second": n_nodes / elapsed if elapsed else 0.0}
+    if divide:
+        result["divide"] = divide_counts
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count the positions of the game tree below a dealt position.")
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=RNG_SEED)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--plies", type=int, default=0,
+                        help="Random actions to play from the deal before counting.")
+    parser.add_argument("--divide", action="store_true")
+    args = parser.parse_args()
+
+    state = new_game(n_player=args.players, seed=args.seed)
+    rng = state.spawn_rng()
+    for i in range(args.plies):
+        if state.is_game_over:
+            break
+        state.sample_legal_action(rng).enact_consequents()
+
+    result = perft(state, args.depth, divide=args.divide)
+    for d in range(args.depth + 1):
+        print("depth {:>2}: {:>12d} nodes  {}".format(d, result["nodes_by_depth"][d], result["types_by_depth"][d]))
+    if args.divide:
+        for label, n_leaves in sorted(result["divide"].items()):
+            print("{:<32} {:>12d}".format(label, n_leaves))
+    print("{:.3f}s, {:.0f} nodes/s".format(result["elapsed_s"], result["nodes_per_second"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+from multiprocessing import Pool
+from time import perf_counter
+import argparse
+import os
+from state import *
+
+#################
+# Move Policies #
+#################
+# A policy is called as policy(state, legal_actions, rng) and returns one of legal_actions.
+# Policies are referred to by name in POLICIES so that they can be shipped to worker processes.
+def random_policy(state, legal_actions, rng):
+    ''' Choose uniformly at random. '''
+    return legal_actions[rng.integers(len(legal_actions))]
+
+
+def first_policy(state, legal_actions, rng):
+    ''' Choose the first legal action, i.e. in the order determine_legal_actions() lists them. '''
+    return legal_actions[0]
+
+
+def greedy_policy(state, legal_actions, rng):
+    ''' Purchase the card worth the most victory points if possible, otherwise choose at random. '''
+    purchases = [action for action in legal_actions if isinstance(action, PurchaseCard)]
+    if purchases:
+        best_vp = max(action.ref_card.victory_points for action in purchases)
+        best_purchases = [action for action in purchases if (action.ref_card.victory_points == best_vp)]
+        return best_purchases[rng.integers(len(best_purchases))]
+    return random_policy(state, legal_actions, rng)
+
+
+POLICIES = {"random": random_policy,
+            "first": first_policy,
+            "greedy": greedy_policy}
+
+
+def resolve_policy(policy):
+    ''' Accept either a policy or the name of one in POLICIES. '''
+    if callable(policy):
+        return policy
+    return POLICIES[policy]
+
+
+#############
+# Self-Play #
+#############
+def play_game(n_player, seed, game_index, policies=("random",), max_plies=1000):
+    '''\
+        Play one complete game and return a dict summarising it.
+
+        n_player    <int>                       Number of players.
+        seed        <int>                       Batch seed; with game_index it fully determines the game,
+                                                see compute_game_seed_sequence().
+        game_index  <int>                       Index of the game within its batch.
+        policies    <Sequence[policy]>          Policy (or name of one) per seat; a shorter sequence
+                                                is cycled through.
+        max_plies   <int>                       Give up on the game after this many plies.
+
+        A ply is one player's turn, i.e. one START_PLY action.
+    '''
+    state = new_game(n_player=n_player, seed=compute_game_seed_sequence(seed, game_index))
+    seat_policies = [resolve_policy(policies[pid % len(policies)]) for pid in range(n_player)]
+    seat_rngs = [state.spawn_rng() for pid in range(n_player)]
+
+    n_plies = 0
+    while not(state.is_game_over) and (n_plies < max_plies):
+        if (state.subphase == START_PLY):
+            n_plies += 1
+        legal_actions = state.determine_legal_actions()
+        pid = state.active_player_idx
+        action = seat_policies[pid](state, legal_actions, seat_rngs[pid])
+        action.enact_consequents()
+
+    victory_tuples = [state.tally_victory_points(pid=pid) for pid in range(n_player)]
+    return {"game_index": game_index,
+            "is_game_over": state.is_game_over,
+            "winners": state.determine_winner() if state.is_game_over else [],
+            "victory_points": [t[0] for t in victory_tuples],
+            "n_cards_purchased": [t[1] for t in victory_tuples],
+            "n_nobles": [len(state.filter_by_pid(pid, state.noble_list)) for pid in range(n_player)],
+            "n_plies": n_plies}
+
+
+def play_game_task(task):
+    ''' Unpack a task tuple for Pool.imap_unordered(). '''
+    return play_game(*task)
+
+
+def run_games(n_games,
+              n_player=2,
+              seed=RNG_SEED,
+              policies=("random",),
+              max_plies=1000,
+              processes=None,
+              chunksize=None):
+    '''\
+        Play n_games games across a process pool, yielding each game's summary as it finishes
+        (in completion order). Every game is seeded from (seed, game_index), so the results do
+        not depend on the number of processes or on which worker ran which game.
+
+        processes   <int>   Worker processes; None means one per CPU, and 1 plays the games in
+                            this process.
+        chunksize   <int>   Games dispatched to a worker at a time; by default the games are
+                            split into about four chunks per worker.
+    '''
+    tasks = [(n_player, seed, game_index, tuple(policies), max_plies) for game_index in range(n_games)]
+    if (processes == 1):
+        for task in tasks:
+            yield play_game_task(task)
+        return
+
+    if (chunksize is None):
+        n_workers = processes or os.cpu_count() or 1
+        chunksize = max(1, n_games // (4 * n_workers))
+    with Pool(processes=processes) as pool:
+        for result in pool.imap_unordered(play_game_task, tasks, chunksize=chunksize):
+            yield result
+
+
+class ResultAggregator(Base):
+    ''' Accumulate play_game() summaries into per-seat and per-game statistics. '''
+    def __init__(self, n_player, **kwargs):
+        super().__init__(**kwargs)
+        self.n_player = n_player
+        self.n_games = 0
+        self.n_unfinished = 0
+        self.n_ties = 0
+        self.n_wins = [0] * n_player
+        self.total_victory_points = [0] * n_player
+        self.total_cards_purchased = [0] * n_player
+        self.total_nobles = [0] * n_player
+        self.total_plies = 0
+        self.start_time = perf_counter()
+
+    def add(self, result):
+        self.n_games += 1
+        self.total_plies += result["n_plies"]
+        if not(result["is_game_over"]):
+            self.n_unfinished += 1
+        elif (len(result["winners"]) > 1):
+            self.n_ties += 1
+        else:
+            self.n_wins[result["winners"][0]] += 1
+        for pid in range(self.n_player):
+            self.total_victory_points[pid] += result["victory_points"][pid]
+            self.total_cards_purchased[pid] += result["n_cards_purchased"][pid]
+            self.total_nobles[pid] += result["n_nobles"][pid]
+
+    def snapshot(self):
+        ''' Self-documenting. '''
+        n_games = max(1, self.n_games)
+        elapsed = perf_counter() - self.start_time
+        return {"n_games": self.n_games,
+                "n_unfinished": self.n_unfinished,
+                "n_ties": self.n_ties,
+                "n_wins": list(self.n_wins),
+                "mean_victory_points": [vp / n_games for vp in self.total_victory_points],
+                "mean_cards_purchased": [n / n_games for n in self.total_cards_purchased],
+                "mean_nobles": [n / n_games for n in self.total_nobles],
+                "mean_plies": self.total_plies / n_games,
+                "games_per_second": self.n_games / elapsed if elapsed else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play self-play games across a process pool.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=RNG_SEED)
+    parser.add_argument("--policy", action="append", choices=sorted(POLICIES),
+                        help="Policy per seat, repeat for each seat (default: random).")
+    parser.add_argument("--max-plies", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=None)
+    parser.add_argument("--report-every", type=int, default=100)
+    args = parser.parse_args()
+
+    aggregator = ResultAggregator(n_player=args.players)
+    for result in run_games(n_games=args.games,
+                            n_player=args.players,
+                            seed=args.seed,
+                            policies=args.policy or ["random"],
+                            max_plies=args.max_plies,
+                            processes=args.processes,
+                            chunksize=args.chunksize):
+        aggregator.add(result)
+        if not(aggregator.n_games % args.report_every):
+            print(aggregator.snapshot())
+    print(aggregator.snapshot())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from ontology import *
+from zobrist import *
 from itertools import combinations, permutations, chain, product
-from time import time
+from time import time, perf_counter
+import struct
 
 #####################
 # Auxillary Functions
@@ -23,19 +25,58 @@ def compute_n_noble(n_player):
     return min(MAX_N_NOBLE, result)
 
 
+def pack_nibbles(values):
+    ''' Pack values (each < 16) two to a byte, the first of each pair in the low nibble. '''
+    padded = list(values) + [0] * (len(values) % 2)
+    return [padded[i] | (padded[i + 1] << 4) for i in range(0, len(padded), 2)]
+
+
+def unpack_nibbles(packed, n_value):
+    ''' Inverse of pack_nibbles(). '''
+    values = []
+    for byte in packed:
+        values.append(byte & 0b1111)
+        values.append(byte >> 4)
+    return values[:n_value]
+
+
 def avoid_subzero(number):
     return max(0, number)
 
 
+def compute_game_seed_sequence(seed, game_index):
+    '''\
+        Return the SeedSequence for game number game_index of a batch seeded with seed.
+        It equals the game_index'th child spawned from SeedSequence(seed), so a game is
+        reproducible from (seed, game_index) alone, whichever process ends up playing it.
+    '''
+    return np.random.SeedSequence(entropy=seed, spawn_key=(game_index,))
+
+
 ##################
 # Game State Class
 ##################
 class GameState(Base):
-    def __init__(self, n_player, **kwargs):
+    '''\
+        n_player        <int>                           Number of players.
+
+        seed            <Union[None, int, SeedSequence]>
+                                                        Seeds the state's own random stream, rng,
+                                                        which is used for all of its shuffling.
+                                                        None draws fresh entropy from the OS.
+    '''
+    def __init__(self, n_player, seed=None, **kwargs):
         self.n_player = n_player
 
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_sequence = seed
+        else:
+            self.seed_sequence = np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.seed_sequence)
+
         self.active_player_idx = 0
         self.is_final_turn = False
+        self.is_game_over = False
         self.subphase = START_PLY
 
         self.n_tokens_drawn_this_ply = 0
@@ -50,18 +91,48 @@ class GameState(Base):
         self.tier_1_cards = list([])
         self.tier_2_cards = list([])
 
+        # Token bank, see build_token_bank()
+        self.token_counts = None
+        self.token_stacks = list([])
+
+        # Card index, see build_card_index()
+        self.purchased_cards = list([])
+        self.reserved_cards = list([])
+        self.market_cards = list([])
+        self.deck_order = list([])
+        self.deck_cursor = list([])
+        self.bonus_counts = None
+
+        # Make/unmake bookkeeping, see apply() and undo()
+        self.undo_log = list([])
+        self.undo_stack = list([])
+
+        # Position key, see zobrist.py
+        self.zobrist_hash = 0
+
+        # Shared daemon objects, bound to this state
+        self.advance_subphase_consequent = SubphaseConsequent(state=self)
+        self.null_subphase_action = NullSubphaseAction(state=self)
+
+        # Interned Actions, see pooled_action()
+        self.action_pool = dict({})
+
+        # Opt-in counters and timers, see enable_instrumentation()
+        self.instrumentation = None
+
         self.initial_construction()
         super().__init__(**kwargs)
 
     def refresh_ply_variables(self):
-        self.subphase = START_PLY
-        self.n_tokens_drawn_this_ply = 0
-        self.tier_to_refill = -1
+        self.set_object_attribute(self, 'subphase', START_PLY)
+        self.set_object_attribute(self, 'n_tokens_drawn_this_ply', 0)
+        self.set_object_attribute(self, 'tier_to_refill', -1)
 
 
     def refresh_state(self):
         self.active_player_idx = 0
         self.is_final_turn = False
+        self.is_game_over = False
         self.subphase = START_PLY
 
         self.n_tokens_drawn_this_ply = 0
@@ -75,6 +146,9 @@ class GameState(Base):
         self.tier_0_cards.clear()
         self.tier_1_cards.clear()
         self.tier_2_cards.clear()
+
+        self.undo_log.clear()
+        self.undo_stack.clear()
         self.initial_construction()
 
 
@@ -92,17 +166,226 @@ class GameState(Base):
                 self.token_list.extend([Onyx(), Ruby(), Emerald(), Sapphire(), Diamond()])
             for j in range(n_joker):
                 self.token_list.append(Joker())
+            self.build_token_bank()
+
+    def build_token_bank(self):
+        '''\
+            Tokens of the same symbol are interchangeable, so who holds what is summarised by
+
+            token_counts    <np.ndarray[int]>           (n_player + 1) x N_TOKEN_SYMBOL matrix where
+                                                        token_counts[pid + 1][TOKEN_SYMBOL_IDX[symbol]]
+                                                        is the number of tokens with that symbol
+                                                        controlled by pid. Row SUPPLY_ROW holds the
+                                                        uncontrolled tokens.
+
+            token_stacks    <List[List[List[Token]]]>   The Token objects behind each entry of
+                                                        token_counts, indexed the same way.
+
+            Both are kept up to date by set_object_attribute() whenever a Token changes cpid.
+        '''
+        self.token_counts = np.zeros((self.n_player + 1, N_TOKEN_SYMBOL), dtype=int)
+        self.token_stacks = [[[] for symbol in ALL_TOKEN_SYMBOLS] for row in range(self.n_player + 1)]
+        for token in self.token_list:
+            symbol_idx = TOKEN_SYMBOL_IDX[token.symbol]
+            self.token_counts[token.cpid + 1, symbol_idx] += 1
+            self.token_stacks[token.cpid + 1][symbol_idx].append(token)
+
+    def move_token(self, token, old_cpid, new_cpid):
+        ''' Update the token bank and zobrist_hash to reflect token passing from old_cpid to new_cpid. '''
+        symbol_idx = TOKEN_SYMBOL_IDX[token.symbol]
+        self.adjust_token_count(old_cpid + 1, symbol_idx, -1)
+        self.token_stacks[old_cpid + 1][symbol_idx].remove(token)
+        self.adjust_token_count(new_cpid + 1, symbol_idx, 1)
+        self.token_stacks[new_cpid + 1][symbol_idx].append(token)
+
+    def adjust_token_count(self, owner_row, symbol_idx, delta):
+        n_token = int(self.token_counts[owner_row, symbol_idx])
+        self.token_counts[owner_row, symbol_idx] = n_token + delta
+        self.zobrist_hash ^= token_count_key(owner_row, symbol_idx, n_token)
+        self.zobrist_hash ^= token_count_key(owner_row, symbol_idx, n_token + delta)
+
+    def build_card_index(self):
+        '''\
+            Cards are indexed by where they currently are:
+
+            purchased_cards <List[Dict[int, Card]]>     Per pid, the cards they have purchased.
+            reserved_cards  <List[Dict[int, Card]]>     Per pid, the cards they have reserved.
+            market_cards    <List[Dict[int, Card]]>     Per tier, the face-up uncontrolled cards.
+
+            Each dict maps card_id to Card and is kept up to date by set_object_attribute()
+            whenever a Card changes one of CARD_INDEX_ATTRS. The dicts iterate in card_id order,
+            however the cards arrived (e.g. via undo()).
+
+            The undealt cards of each tier are the tail of its deck:
+
+            deck_order      <List[List[int]]>           Per tier, the card_ids of the shuffled deck in
+                                                        deal order.
+            deck_cursor     <List[int]>                 Per tier, how many cards have left the top of the
+                                                        deck (dealt, or reserved blind), so the top card
+                                                        is deck_order[tier][deck_cursor[tier]].
+
+            Cards only ever leave a deck from the top, and undo() puts them back in reverse, so
+            dealing, peeking and counting the cards left are all constant time.
+
+            bonus_counts    <np.ndarray[int]>           n_player x N_NON_JOKER_TOKEN_SYMBOL matrix where
+                                                        bonus_counts[pid] is the bonus vector afforded
+                                                        to pid by their purchased cards, in the order
+                                                        of NON_JOKER_TOKEN_SYMBOLS.
+        '''
+        self.bonus_counts = np.zeros((self.n_player, N_NON_JOKER_TOKEN_SYMBOL), dtype=int)
+        self.purchased_cards = [{} for pid in range(self.n_player)]
+        self.reserved_cards = [{} for pid in range(self.n_player)]
+        self.market_cards = [{} for tier in range(N_TIER)]
+        self.deck_order = [[card.card_id for card in self.get_deck_by_tier(tier)] for tier in range(N_TIER)]
+        # Every card found still in its deck below moves the cursor back up by one.
+        self.deck_cursor = [len(order) for order in self.deck_order]
+        for tier in range(N_TIER):
+            for card in self.get_deck_by_tier(tier):
+                self.index_card(card)
+
+    def is_in_deck(self, card):
+        ''' A card is in its deck while it is uncontrolled and hasn't been dealt. '''
+        return (card.cpid == -1) and not(card.is_visible)
+
+    def return_card_location(self, card):
+        ''' Return the index dict the card belongs in given its cpid and is_reserved; not for cards in a deck. '''
+        if (card.cpid == -1):
+            return self.market_cards[card.tier]
+        if card.is_reserved:
+            return self.reserved_cards[card.cpid]
+        return self.purchased_cards[card.cpid]
+
+    def index_card(self, card):
+        # Case: The card is (back) on top of its deck.
+        if self.is_in_deck(card):
+            self.deck_cursor[card.tier] -= 1
+            return
+        location = self.return_card_location(card)
+        last_card_id = next(reversed(location), None)
+        location[card.card_id] = card
+        # Case: The card was just purchased, so it now affords its controller a bonus.
+        if (card.cpid != -1) and not(card.is_reserved):
+            self.bonus_counts[card.cpid, card.bonus_idx] += 1
+        # Case: The card was filed behind a card which should follow it; restore the order.
+        if (last_card_id is not None) and (last_card_id > card.card_id):
+            ordered_items = sorted(location.items())
+            location.clear()
+            location.update(ordered_items)
+
+    def unindex_card(self, card):
+        # Case: The card is leaving the top of its deck.
+        if self.is_in_deck(card):
+            self.deck_cursor[card.tier] += 1
+            return
+        location = self.return_card_location(card)
+        del location[card.card_id]
+        if (card.cpid != -1) and not(card.is_reserved):
+            self.bonus_counts[card.cpid, card.bonus_idx] -= 1
+
+    def peek_deck(self, tier):
+        ''' Return the top card of the tier deck, or None if it is empty. '''
+        cursor = self.deck_cursor[tier]
+        order = self.deck_order[tier]
+        if (cursor < len(order)):
+            return self.card_list[order[cursor]]
+        return None
+
+    def count_deck_cards(self, tier):
+        ''' Self-documenting. '''
+        return len(self.deck_order[tier]) - self.deck_cursor[tier]
+
+    def return_deck_cards(self, tier):
+        ''' Return the undealt cards of the tier deck in deal order. '''
+        return [self.card_list[card_id] for card_id in self.deck_order[tier][self.deck_cursor[tier]:]]
+
+    def set_object_attribute(self, ref_obj, ref_attr, new_value):
+        '''\
+            Assign new_value to ref_obj.ref_attr, keeping the derived indexes of the state
+            (the token bank and the card index) consistent with the game objects. Every
+            modification of the state made by a Consequent is routed through here.
+
+            While an apply() is in progress the prior value is recorded so undo() can
+            restore it.
+        '''
+        old_value = getattr(ref_obj, ref_attr)
+        if (old_value == new_value):
+            return
+        if self.undo_stack:
+            self.undo_log.append((ref_obj, ref_attr, old_value))
+        self.update_object_attribute(ref_obj, ref_attr, old_value, new_value)
+
+    def update_object_attribute(self, ref_obj, ref_attr, old_value, new_value):
+        '''\
+            Perform the assignment for set_object_attribute() and undo(), without recording it,
+            and update zobrist_hash incrementally.
+        '''
+        is_indexed_card = (ref_attr in CARD_INDEX_ATTRS) and isinstance(ref_obj, Card)
+        is_hashed_noble = (ref_attr in NOBLE_HASH_ATTRS) and isinstance(ref_obj, Noble)
+        if is_indexed_card:
+            self.unindex_card(ref_obj)
+            self.zobrist_hash ^= card_key(ref_obj)
+        elif is_hashed_noble:
+            self.zobrist_hash ^= noble_key(ref_obj)
+        elif (ref_obj is self) and (ref_attr in HASHED_STATE_ATTRS):
+            self.zobrist_hash ^= state_attribute_key(ref_attr, old_value)
+            self.zobrist_hash ^= state_attribute_key(ref_attr, new_value)
+
+        setattr(ref_obj, ref_attr, new_value)
+
+        if is_indexed_card:
+            self.index_card(ref_obj)
+            self.zobrist_hash ^= card_key(ref_obj)
+        elif is_hashed_noble:
+            self.zobrist_hash ^= noble_key(ref_obj)
+        elif (ref_attr == 'cpid') and isinstance(ref_obj, Token):
+            self.move_token(ref_obj, old_value, new_value)
+
+    def apply(self, action):
+        '''\
+            Enact the consequents of action, recording every modification they make so
+            that a subsequent undo() returns the state to exactly where it was.
+            Calls to apply() and undo() nest like a stack.
+        '''
+        self.undo_stack.append(len(self.undo_log))
+        action.enact_consequents()
+
+    def undo(self):
+        ''' Revert the most recent apply() which hasn't yet been undone. '''
+        log_start = self.undo_stack.pop()
+        while (len(self.undo_log) > log_start):
+            ref_obj, ref_attr, old_value = self.undo_log.pop()
+            self.update_object_attribute(ref_obj, ref_attr, getattr(ref_obj, ref_attr), old_value)
+
+    def enable_instrumentation(self):
+        '''\
+            Start counting and timing the hot paths of this state; returns its Instrumentation.
+            Until this is called (and after disable_instrumentation()) nothing is measured and
+            nothing is wrapped, so there is no overhead.
+        '''
+        if (self.instrumentation is None):
+            self.instrumentation = Instrumentation(state=self)
+        self.instrumentation.enable()
+        return self.instrumentation
+
+    def disable_instrumentation(self):
+        ''' Stop measuring; the counts gathered so far remain available in instrumentation. '''
+        if (self.instrumentation is not None):
+            self.instrumentation.disable()
+
+    def instrumentation_snapshot(self):
+        ''' Self-documenting; None if instrumentation was never enabled. '''
+        if (self.instrumentation is None):
+            return None
+        return self.instrumentation.snapshot()
 
     def construct_nobles(self):
         if not(self.noble_list):
             for i in range(MAX_N_NOBLE):
-                self.noble_list.append(Noble(noble_id=i,
-                                             victory_points=N_VP_PER_NOBLE,
-                                             card_cost=list(NOBLE_SPECS_LIST[i])))
+                self.noble_list.append(Noble(noble_id=i))
     def construct_cards(self):
         if not(self.card_list):
-            for i, card_specs in enumerate(CARD_SPECS_LIST):
-                self.card_list.append(Card(card_id=i, card_spec_list=list(card_specs)))
+            for i in range(N_CARD):
+                self.card_list.append(Card(card_id=i))
 
     def filter_by_boolean_attribute(self, bool_attr, list_of_objects, negate=False):
         return list(filter(lambda card: (getattr(card, bool_attr) != negate), list_of_objects))
@@ -123,6 +406,9 @@ class GameState(Base):
         self.construct_nobles()
         # Instantiate cards
         self.construct_cards()
+        self.partition_cards_by_tier()
+        self.build_card_index()
+        self.zobrist_hash = compute_zobrist_hash(self)
 
     def partition_cards_by_tier(self):
         # NOTE #
@@ -133,8 +419,15 @@ class GameState(Base):
         self.tier_2_cards = self.filter_by_tier(tier=2)
 
     def shuffle(self, list_of_objects):
-        ''' Shuffle a list of objects in place using NumPy's random module. '''
-        np.random.shuffle(list_of_objects)
+        ''' Shuffle a list of objects in place using the state's random stream. '''
+        self.rng.shuffle(list_of_objects)
+
+    def spawn_rng(self):
+        '''\
+            Return a new Generator whose stream is independent of the state's own and of every
+            other one spawned, e.g. for a move policy playing this game.
+        '''
+        return np.random.default_rng(self.seed_sequence.spawn(1)[0])
 
     def return_undealt_cards(self, list_of_cards):
         ''' A card is considered dealt when card.is_visible == True. '''
@@ -142,13 +435,22 @@ class GameState(Base):
                                                 list_of_objects=list_of_cards,
                                                 negate=True)
 
+    def deal_card(self, tier):
+        ''' Turn the top card of the tier deck face up, if there is one. '''
+        top_card = self.peek_deck(tier)
+        if (top_card is not None):
+            self.set_object_attribute(top_card, "is_visible", True)
+
     def deal(self, deck_of_cards):
-        ''' A card is considered dealt when card.is_visible == True. '''
+        '''\
+            A card is considered dealt when card.is_visible == True. Scans deck_of_cards, so it
+            is only used for the nobles; card decks are dealt with deal_card().
+        '''
         undealt = self.return_undealt_cards(list_of_cards=deck_of_cards)
         n_undealt = len(undealt)
         # Case: There's at least 1 undealt card to deal in deck
         if n_undealt:
-            setattr(undealt[0], "is_visible", True)
+            self.set_object_attribute(undealt[0], "is_visible", True)
 
     def deal_n(self, n_to_deal, deck_of_cards):
         for i in range(n_to_deal):
@@ -164,12 +466,13 @@ class GameState(Base):
         ''' Split the card objects into three lists based on their tier. '''
         self.partition_cards_by_tier()
         self.shuffle_decks()
+        self.build_card_index()
 
     def initial_deal(self):
         ''' Make visible the first four cards of each of the development card decks. '''
-        decks_to_deal = [self.tier_0_cards, self.tier_1_cards, self.tier_2_cards]
-        for deck_to_deal in decks_to_deal:
-            self.deal_n(n_to_deal=4, deck_of_cards=deck_to_deal)
+        for tier in range(N_TIER):
+            for i in range(N_MARKET_CARD_PER_TIER):
+                self.deal_card(tier)
 
     def arrive_at_initial_state(self):
         # Split the cards in self.card_list into the three tier decks
@@ -203,29 +506,37 @@ class GameState(Base):
         '''\
             Return the number of tokens with the given symbol and pid.
         '''
-        token_match = self.return_objects_by_symbol_and_pid(symbol=symbol,
-                                                            pid=pid,
-                                                            list_of_objects=self.token_list)
-        return len(token_match)
+        return int(self.token_counts[pid + 1, TOKEN_SYMBOL_IDX[symbol]])
+
+    def return_tokens_by_symbol_and_pid(self, symbol, pid):
+        '''\
+            Return the tokens with the given symbol and pid.
+        '''
+        return list(self.token_stacks[pid + 1][TOKEN_SYMBOL_IDX[symbol]])
+
+    def count_tokens_by_pid(self, pid):
+        ''' Self-documenting. '''
+        return int(self.token_counts[pid + 1].sum())
 
     def return_reserved_cards_by_pid(self, pid):
         ''' Self-documenting. '''
-        cards_controlled_by_pid = self.filter_by_pid(pid=pid, list_of_objects=self.card_list)
-        return self.filter_by_boolean_attribute(bool_attr="is_reserved",
-                                                list_of_objects=cards_controlled_by_pid)
+        return list(self.reserved_cards[pid].values())
 
     def count_reserved_cards_by_pid(self, pid):
         ''' Self-documenting. '''
-        cards_reserved_by_pid = self.return_reserved_cards_by_pid(pid=pid)
-        return len(cards_reserved_by_pid)
+        return len(self.reserved_cards[pid])
 
 
     def return_purchased_cards_by_pid(self, pid):
         ''' Self-documenting. '''
-        cards_controlled_by_pid = self.filter_by_pid(pid=pid, list_of_objects=self.card_list)
-        return self.filter_by_boolean_attribute(bool_attr="is_reserved",
-                                                list_of_objects=cards_controlled_by_pid,
-                                                negate=True)
+        return list(self.purchased_cards[pid].values())
+
+    def return_market_cards(self):
+        ''' Return the face-up uncontrolled cards of every tier. '''
+        result = []
+        for market in self.market_cards:
+            result.extend(market.values())
+        return result
 
 
     def return_bonus_by_symbol_and_pid(self, symbol, pid):
@@ -233,9 +544,7 @@ class GameState(Base):
             Return the discount on cost components of a given symbol for a given player
             based on their purchased cards.
         '''
-        cards_purchased_by_pid = self.return_purchased_cards_by_pid(pid=pid)
-        cards_purchased_by_pid_with_given_bonus = list(filter(lambda card: (card.bonus == symbol), cards_purchased_by_pid))
-        return len(cards_purchased_by_pid_with_given_bonus)
+        return int(self.bonus_counts[pid, TOKEN_SYMBOL_IDX[symbol]])
 
     def solve_wide_draw_combinations(self):
         '''\
@@ -244,9 +553,8 @@ class GameState(Base):
         '''
         result = []
         symbols_for_wide_draw = []
-        for token_symbol in NON_JOKER_TOKEN_SYMBOLS:
-            token_count = self.count_tokens_by_symbol_and_pid(symbol=token_symbol,
-                                                              pid=-1)
+        supply_counts = self.token_counts[SUPPLY_ROW].tolist()
+        for token_symbol, token_count in zip(NON_JOKER_TOKEN_SYMBOLS, supply_counts):
             # Case: There are enough tokens with this symbol to participate in a wide draw.
             if (token_count >= MIN_N_TOKEN_FOR_WIDE_DRAW):
                 symbols_for_wide_draw.append(token_symbol)
@@ -263,9 +571,8 @@ class GameState(Base):
             uncontrolled members to qualify for a double draw.
         '''
         symbols_for_double_draw = []
-        for token_symbol in NON_JOKER_TOKEN_SYMBOLS:
-            token_count = self.count_tokens_by_symbol_and_pid(symbol=token_symbol,
-                                                              pid=-1)
+        supply_counts = self.token_counts[SUPPLY_ROW].tolist()
+        for token_symbol, token_count in zip(NON_JOKER_TOKEN_SYMBOLS, supply_counts):
             # Case: There are enough tokens with this symbol to participate in a wide draw.
             if (token_count >= MIN_N_TOKEN_FOR_DOUBLE_DRAW):
                 symbols_for_double_draw.append(token_symbol)
@@ -273,24 +580,22 @@ class GameState(Base):
         return [(symbol, symbol) for symbol in symbols_for_double_draw]
 
 
-    def convert_token_symbol_combination(self, combo):
+    def convert_token_symbol_combination(self, combo, pid=-1):
         '''\
             A wide draw combination is a tuple of symbols. This method returns
-            a list of uncontrolled Tokens with the same symbol composition.
+            a list of Tokens controlled by pid (uncontrolled by default) with the
+            same symbol composition.
         '''
         result = []
-        token_ids_so_far = []
+        n_used_by_symbol = [0] * N_TOKEN_SYMBOL
         for symbol in combo:
-            match_tokens = self.return_objects_by_symbol_and_pid(symbol=symbol,
-                                                                 pid=-1,
-                                                                 list_of_objects=self.token_list)
-            for token in match_tokens:
-                token_id = id(token)
-                # Case: We haven't used this token yet.
-                if not(token_id in token_ids_so_far):
-                    token_ids_so_far.append(token_id)
-                    result.append(token)
-                    break
+            symbol_idx = TOKEN_SYMBOL_IDX[symbol]
+            match_tokens = self.token_stacks[pid + 1][symbol_idx]
+            n_used = n_used_by_symbol[symbol_idx]
+            # Case: There's an uncontrolled token with this symbol we haven't used yet.
+            if (n_used < len(match_tokens)):
+                result.append(match_tokens[n_used])
+                n_used_by_symbol[symbol_idx] += 1
         return list(result)
 
 
@@ -305,17 +610,17 @@ class GameState(Base):
         '''\
             Existential predicate for uncontrolled Joker tokens.
         '''
-        uncontrolled_jokers = self.return_objects_by_symbol_and_pid(symbol="j",
-                                                                    pid=-1,
-                                                                    list_of_objects=self.token_list)
+        uncontrolled_jokers = self.token_stacks[SUPPLY_ROW][JOKER_IDX]
         if uncontrolled_jokers:
             # Make the active player the controller of an uncontrolled Joker token
-            attain_joker_consequent = Consequent(ref_obj=uncontrolled_jokers[0],
+            attain_joker_consequent = Consequent(state=self,
+                                                 ref_obj=uncontrolled_jokers[0],
                                                  ref_attr="cpid",
                                                  new_value=self.active_player_idx)
 
             # Alert the state to reflect n_tokens_drawn_this_ply to 1
-            n_token_drawn_consequent = Consequent(ref_obj=GAMESTATE,
+            n_token_drawn_consequent = Consequent(state=self,
+                                                  ref_obj=self,
                                                   ref_attr="n_tokens_drawn_this_ply",
                                                   new_value=1)
             return [attain_joker_consequent, n_token_drawn_consequent]
@@ -325,10 +630,7 @@ class GameState(Base):
         '''\
             Return the list of cards which are eligible for purchasing.
         '''
-        visible_cards = self.filter_by_boolean_attribute(bool_attr="is_visible",
-                                                         list_of_objects=self.card_list)
-        uncontrolled_visible_cards = self.filter_by_pid(pid=-1,
-                                                        list_of_objects=visible_cards)
+        uncontrolled_visible_cards = self.return_market_cards()
         cards_reserved_by_pid = self.return_reserved_cards_by_pid(pid=pid)
         eligible_cards_to_purchase_for_player_with_given_pid = cards_reserved_by_pid + uncontrolled_visible_cards
         return eligible_cards_to_purchase_for_player_with_given_pid
@@ -336,19 +638,12 @@ class GameState(Base):
 
     def return_eligible_cards_to_reserve_by_pid(self, pid):
         ''' Self-documenting. '''
-        visible_cards = self.filter_by_boolean_attribute(bool_attr="is_visible",
-                                                         list_of_objects=self.card_list)
-        uncontrolled_visible_cards = self.filter_by_pid(pid=-1,
-                                                        list_of_objects=visible_cards)
-
-        undealt_t0 = self.return_undealt_cards(list_of_cards=self.tier_0_cards)
-        undealt_t1 = self.return_undealt_cards(list_of_cards=self.tier_1_cards)
-        undealt_t2 = self.return_undealt_cards(list_of_cards=self.tier_2_cards)
-
-        decks_to_check = [undealt_t0, undealt_t1, undealt_t2]
-        for deck_to_check in decks_to_check:
-            if deck_to_check:
-                uncontrolled_visible_cards.append(deck_to_check[0])
+        uncontrolled_visible_cards = self.return_market_cards()
+        # Case: A card can be reserved blind from the top of each non-empty deck.
+        for tier in range(N_TIER):
+            top_card = self.peek_deck(tier)
+            if (top_card is not None):
+                uncontrolled_visible_cards.append(top_card)
         return uncontrolled_visible_cards
 
 
@@ -358,12 +653,13 @@ class GameState(Base):
             in view of the bonus resource values afforded to them by their
             currently owned cards.
         '''
-        discount_diamond = avoid_subzero(card.cost_diamond - self.return_bonus_by_symbol_and_pid(symbol="w", pid=pid))
-        discount_sapphire = avoid_subzero(card.cost_sapphire - self.return_bonus_by_symbol_and_pid(symbol="b", pid=pid))
-        discount_emerald = avoid_subzero(card.cost_emerald - self.return_bonus_by_symbol_and_pid(symbol="g", pid=pid))
-        discount_ruby = avoid_subzero(card.cost_ruby - self.return_bonus_by_symbol_and_pid(symbol="r", pid=pid))
-        discount_onyx = avoid_subzero(card.cost_onyx - self.return_bonus_by_symbol_and_pid(symbol="o", pid=pid))
-        return {"w":discount_diamond, "b":discount_sapphire, "g":discount_emerald, "r":discount_ruby, "o":discount_onyx}
+        return dict(zip(NON_JOKER_TOKEN_SYMBOLS, self.apparent_cost_vector(pid=pid, card=card).tolist()))
+
+    def apparent_cost_vector(self, pid, card):
+        '''\
+            As apparent_cost_analysis(), but as a vector in the order of NON_JOKER_TOKEN_SYMBOLS.
+        '''
+        return np.maximum(card.cost_vector - self.bonus_counts[pid], 0)
 
     def cost_payable(self, cd, pcd):
         excess = 0
@@ -372,7 +668,9 @@ class GameState(Base):
             if n_component:
                 n_available = pcd[component]
                 delta_n = n_component - n_available
-                if delta_n:
+                # Only a shortfall needs covering; gems paid over the cost of one colour
+                # can't stand in for another.
+                if (delta_n > 0):
                     excess += delta_n
         excess -= pcd['j']
         if (excess < 1):
@@ -380,6 +678,37 @@ class GameState(Base):
         else:
             return False
 
+    def compute_joker_shortfall(self, pid, card_ids):
+        '''\
+            Return, for each card_id, how many more jokers the player with given pid would need
+            to afford the card: one broadcasted computation over the rows of CARD_COST_MATRIX.
+        '''
+        player_tokens = self.token_counts[pid + 1]
+        apparent_costs = np.maximum(CARD_COST_MATRIX[card_ids] - self.bonus_counts[pid], 0)
+        gem_shortfall = np.maximum(apparent_costs - player_tokens[:N_NON_JOKER_TOKEN_SYMBOL], 0).sum(axis=1)
+        return np.maximum(gem_shortfall - player_tokens[JOKER_IDX], 0)
+
+    def affordability_analysis(self, pid):
+        '''\
+            Return (eligible_cards, joker_shortfall) where joker_shortfall[i] is how many jokers
+            the player with given pid is short of affording eligible_cards[i]; 0 means affordable.
+        '''
+        eligible_cards = self.return_eligible_cards_to_purchase_by_pid(pid=pid)
+        card_ids = np.fromiter((card.card_id for card in eligible_cards), dtype=int, count=len(eligible_cards))
+        return eligible_cards, self.compute_joker_shortfall(pid=pid, card_ids=card_ids)
+
+    def market_affordability_analysis(self):
+        '''\
+            Return (market_cards, joker_shortfall) where joker_shortfall is an n_player x len(market_cards)
+            matrix of how many jokers each player is short of affording each face-up card.
+        '''
+        market_cards = self.return_market_cards()
+        card_ids = np.fromiter((card.card_id for card in market_cards), dtype=int, count=len(market_cards))
+        apparent_costs = np.maximum(CARD_COST_MATRIX[card_ids][np.newaxis, :, :] - self.bonus_counts[:, np.newaxis, :], 0)
+        player_tokens = self.token_counts[1:]
+        gem_shortfall = np.maximum(apparent_costs - player_tokens[:, np.newaxis, :N_NON_JOKER_TOKEN_SYMBOL], 0).sum(axis=2)
+        return market_cards, np.maximum(gem_shortfall - player_tokens[:, JOKER_IDX, np.newaxis], 0)
+
     def determine_purchase_choices(self, pid):
         '''\
             Return the list of cards which are:
@@ -387,47 +716,14 @@ class GameState(Base):
                 have a cost, after taking bonus resource values into account, which can be
                 paid with or without Tokens.
         '''
-        jokers_by_pid = self.return_objects_by_symbol_and_pid(symbol="j",
-                                                              pid=pid,
-                                                              list_of_objects=self.token_list)
-        n_jokers_by_pid = len(jokers_by_pid)
-
-        affordable_cards = []
-        final_analysis_excess = 0
-
-        # 1) Start with cards the player with given pid can purchase
-        eligible_cards_to_purchase_by_pid = self.return_eligible_cards_to_purchase_by_pid(pid=pid)
-
-        # 2) For each of these eligible cards, compute the apparent_cost_analysis
-        for eligible_card in eligible_cards_to_purchase_by_pid:
-            final_analysis_excess = 0
-            cost_analysis_dict = self.apparent_cost_analysis(pid=pid, card=eligible_card)
-
-        # 3) Given an apparent cost analysis, for each key that has a value > zero,
-        #    subtract the number of tokens of the corresponding symbol controlled by player with given pid
-            for symbol_qua_key in cost_analysis_dict:
-                symbol_value = cost_analysis_dict[symbol_qua_key]
-                if symbol_value:
-                    n_tokens_to_pay_excess = self.count_tokens_by_symbol_and_pid(symbol=symbol_qua_key,
-                                                                                 pid=pid)
-                    final_analysis_excess += avoid_subzero(symbol_value - n_tokens_to_pay_excess)
-
-        # 4) Subtract n_jokers_by_pid from final_analysis_excess
-            final_analysis_excess -= n_jokers_by_pid
-            final_analysis_excess = avoid_subzero(final_analysis_excess)
-
-            if not(final_analysis_excess):
-                affordable_cards.append(eligible_card)
-
-        return list(affordable_cards)
+        eligible_cards, joker_shortfall = self.affordability_analysis(pid=pid)
+        return [card for card, n_short in zip(eligible_cards, joker_shortfall.tolist()) if not(n_short)]
 
 
     def gather_tokens_given_pid(self, pid):
         result = {}
         for symbol in ALL_TOKEN_SYMBOLS:
-            result[symbol] = list(self.return_objects_by_symbol_and_pid(symbol=symbol,
-                                                                        pid=pid,
-                                                                        list_of_objects=self.token_list))
+            result[symbol] = self.return_tokens_by_symbol_and_pid(symbol=symbol, pid=pid)
         return dict(list(result.items()))
 
     def tally_victory_points(self, pid):
@@ -442,51 +738,51 @@ class GameState(Base):
             vp_result += noble.victory_points
         return (vp_result, n_purchased_result, pid)
 
-    def determine_winner(self):
+    def determine_winner(self, verbose=False):
+        '''\
+            Return the list of winning pids: those with the most victory points, and among them
+            those with the fewest purchased cards. More than one pid means a tie.
+        '''
         victory_tuples = []
         for i in range(self.n_player):
             this_player_victory_tuple = self.tally_victory_points(pid=i)
             victory_tuples.append(this_player_victory_tuple)
 
         sorted_victory_tuples = sorted(victory_tuples, key=lambda t: t[0], reverse=True)
-        print("sorted_victory_tuples: {}".format(sorted_victory_tuples))
         best_vp = sorted_victory_tuples[0][0]
-        print("best_vp: {}".format(best_vp))
         victory_tuples = list(filter(lambda t: (t[0] == best_vp), sorted_victory_tuples))
-        print("victory_tuples: {}".format(victory_tuples))
         sorted_victory_tuples = sorted(victory_tuples, key=lambda t: t[1])
-        print("sorted_victory_tuples: {}".format(sorted_victory_tuples))
         best_n_purchased = sorted_victory_tuples[0][1]
-        print("best_n_purchased: {}".format(best_n_purchased))
         victory_tuples = list(filter(lambda t: (t[1] == best_n_purchased), sorted_victory_tuples))
-        print("victory_tuples: {}".format(victory_tuples))
         winning_pids = [t[2] for t in victory_tuples]
-        print("winning_pids: {}".format(winning_pids))
-        winning_players = [self.player_list[winning_pid] for winning_pid in winning_pids]
-        print("Winning Players:")
-        for winning_player in winning_players:
-            print(winning_player)
+        if verbose:
+            print("best_vp: {}".format(best_vp))
+            print("best_n_purchased: {}".format(best_n_purchased))
+            print("Winning Players:")
+            for winning_pid in winning_pids:
+                print(self.player_list[winning_pid])
+        return winning_pids
 
     def advance_active_player_idx(self):
         if (self.active_player_idx < (self.n_player - 1)):
-            self.active_player_idx += 1
+            self.set_object_attribute(self, 'active_player_idx', self.active_player_idx + 1)
         else:
-            self.active_player_idx = 0
+            self.set_object_attribute(self, 'active_player_idx', 0)
 
     def advance_subphase(self):
-        ''' Called by the enactment of the ADVANCE_SUBPHASE_CONSEQUENT. '''
+        ''' Called by the enactment of the advance_subphase_consequent. '''
         # Case: We're completed the final subphase
         if (self.subphase == WINNER_CHECK):
-            # Case: It's the final turn.
-            if self.is_final_turn:
-                self.determine_winner()
+            # Case: It's the final turn, and every player has had their ply in it.
+            if self.is_final_turn and (self.active_player_idx == (self.n_player - 1)):
+                self.set_object_attribute(self, 'is_game_over', True)
             # Case: More turns to go.
             else:
                 self.refresh_ply_variables()
                 self.advance_active_player_idx()
         # Case: Otherwise
         else:
-            self.subphase += 1
+            self.set_object_attribute(self, 'subphase', self.subphase + 1)
 
 
     def view_player(self, pid):
@@ -567,6 +863,10 @@ class GameState(Base):
         return keepers
 
     def brute_force_ways_to_pay(self, ref_card, ref_pid):
+        '''\
+            Reference implementation of ways_to_pay() which enumerates combinations of
+            Token objects; kept for cross-checking the count-based enumerator.
+        '''
         cost_analysis_dict = self.apparent_cost_analysis(pid=ref_pid, card=ref_card)
         player_bank_dict = self.gather_tokens_given_pid(pid=ref_pid)
         player_count_dict = self.return_player_count_dict(player_bank_dict)
@@ -588,6 +888,26 @@ class GameState(Base):
         valid_combos = self.validate_combos(combos, cost_analysis_dict)
         return self.unique_signatures(valid_combos)
 
+    def convert_payment_into_symbols(self, payment):
+        '''\
+            A payment is a tuple of token counts in the order of ALL_TOKEN_SYMBOLS.
+            This method returns the tuple of symbols with the same composition.
+        '''
+        result = []
+        for symbol, n_symbol in zip(ALL_TOKEN_SYMBOLS, payment):
+            result.extend([symbol] * n_symbol)
+        return tuple(result)
+
+    def ways_to_pay(self, ref_card, ref_pid):
+        '''\
+            Return each distinct way the player with ref_pid can pay for ref_card as a
+            tuple of token symbols. Works on the apparent cost vector and the player's
+            token counts, so identical tokens are never enumerated separately.
+        '''
+        cost = tuple(self.apparent_cost_vector(pid=ref_pid, card=ref_card).tolist())
+        holding = tuple(self.token_counts[ref_pid + 1].tolist())
+        return [self.convert_payment_into_symbols(payment) for payment in enumerate_payments(cost, holding)]
+
 
     def verify_intact_tiers(self):
         '''\
@@ -596,71 +916,55 @@ class GameState(Base):
         '''
         pass
 
-    def determine_legal_actions_(self):
-        legal_actions = []
-
-        wide_draw_combos = self.solve_wide_draw_combinations()
-        for wd_combo in wide_draw_combos:
-            wide_draw_action = WideDraw(symbols=wd_combo,
-                                        actor_pid=self.active_player_idx)
-            wide_draw_action.generate_consequents()
-            legal_actions.append(wide_draw_action)
-
-        double_draw_combos = self.solve_double_draw_combinations()
-        for dd_combo in double_draw_combos:
-            double_draw_action = DoubleDraw(symbols=dd_combo,
-                                            actor_pid=self.active_player_idx)
-            double_draw_action.generate_consequents()
-            legal_actions.append(double_draw_action)
-
-        n_cards_reserved_by_active_player = self.count_reserved_cards_by_pid(pid=self.active_player_idx)
+    def pooled_action(self, action_class, **params):
+        '''\
+            Return the Action of action_class with the given parameters, constructing it only
+            the first time it is asked for. Actions carry no state of their own until they are
+            enacted (see Action.generate_consequents()), so one instance per distinct set of
+            parameters serves every position it is legal in.
+        '''
+        key = (action_class,) + tuple(params.values())
+        action = self.action_pool.get(key)
+        if (action is None):
+            action = action_class(state=self, **params)
+            self.action_pool[key] = action
+        return action
+
+    def iterate_legal_actions_(self):
+        '''\
+            Lazily yield the Fundamental Actions available to the active player. Actions are
+            yielded as bare descriptors: their consequents are only generated once one is
+            enacted. The state must not be modified while the iteration is in progress.
+        '''
+        pid = self.active_player_idx
+        n_yielded = 0
+
+        for wd_combo in self.solve_wide_draw_combinations():
+            n_yielded += 1
+            yield self.pooled_action(WideDraw, symbols=wd_combo, actor_pid=pid)
+
+        for dd_combo in self.solve_double_draw_combinations():
+            n_yielded += 1
+            yield self.pooled_action(DoubleDraw, symbols=dd_combo, actor_pid=pid)
+
         # Case: Player hasn't hit the limit on number of reserved cards.
-        if self.player_can_reserve_card(pid=self.active_player_idx):
-            # This will return either a list of two consequents, one for attaining a joker token,
-            # the other for updating the state that 1 token was drawn this ply. OR;
-            # None, if there are no free joker tokens left.
-            extra_joker_consequents = self.determine_joker_reward()
-            cards_eligible_to_reserve = self.return_eligible_cards_to_reserve_by_pid(pid=self.active_player_idx)
-            for card_to_reserve in cards_eligible_to_reserve:
-                reservation_action = ReserveCard(ref_card=card_to_reserve,
-                                                 actor_id=self.active_player_idx)
-                reservation_action.generate_consequents()
-                if (extra_joker_consequents is not None):
-                    reservation_action.consequents.extend(extra_joker_consequents)
-
-                # Case: Was this card reserved directly from the top of a deck?
-                if not(card_to_reserve.is_visible):
-                    reservation_action.consequents.append(Consequent(ref_obj=card_to_reserve,
-                                                                     ref_attr="is_visible",
-                                                                     new_value=True))
-                    reservation_action.consequents.append(Consequent(ref_obj=GAMESTATE,
-                                                                     ref_attr="tier_to_refill",
-                                                                     new_value=card_to_reserve.tier))
-                legal_actions.append(reservation_action)
-
-
-        cards_eligible_to_purchase = self.return_eligible_cards_to_purchase_by_pid(pid=self.active_player_idx)
-        # A contract is a 2-tuple of the form:
-        #   (<Card>, <List[Token]>) where:
-        #       contract[0] is the Card to purchase; and,
-        #       contract[1] is a list of Tokens constituting a unique method of payment.
-        contracts = []
-        for card_to_purchase in cards_eligible_to_purchase:
-            ways_to_pay = self.brute_force_ways_to_pay(ref_card=card_to_purchase,
-                                                       ref_pid=self.active_player_idx)
-            for way in ways_to_pay:
-                contracts.append((card_to_purchase, way))
-
-            for contract in contracts:
-                purchase_action = PurchaseCard(ref_card=contract[0],
-                                               actor_id=self.active_player_idx,
-                                               way_to_pay=contract[1])
-                purchase_action.generate_consequents()
-                legal_actions.append(purchase_action)
-
-        for legal_action in legal_actions:
-            legal_action.consequents.append(ADVANCE_SUBPHASE_CONSEQUENT)
+        if self.player_can_reserve_card(pid=pid):
+            for card_to_reserve in self.return_eligible_cards_to_reserve_by_pid(pid=pid):
+                n_yielded += 1
+                yield self.pooled_action(ReserveCard, ref_card=card_to_reserve, actor_id=pid)
 
+        # Each (card, way to pay) pair is a unique purchase contract.
+        for card_to_purchase in self.determine_purchase_choices(pid=pid):
+            for way in self.ways_to_pay(ref_card=card_to_purchase, ref_pid=pid):
+                n_yielded += 1
+                yield self.pooled_action(PurchaseCard, ref_card=card_to_purchase, actor_id=pid, way_to_pay=way)
+
+        # Case: No Fundamental Action is available, so the active player passes.
+        if not(n_yielded):
+            yield self.null_subphase_action
+
+    def determine_legal_actions_(self):
+        legal_actions = list(self.iterate_legal_actions_())
 
         # Following a choice and execution of a Fundamental Action, State Based Actions take place.
         # First:
@@ -727,32 +1031,39 @@ class GameState(Base):
         return list(legal_actions)
 
 
+    def return_available_nobles(self):
+        ''' Return the dealt nobles which haven't visited anyone yet. '''
+        return [noble for noble in self.noble_list if noble.is_visible and (noble.cpid == -1)]
+
+    def noble_eligibility_analysis(self, pid):
+        '''\
+            Return (available_nobles, is_eligible) where is_eligible[i] says whether the player with
+            given pid has the bonuses to be visited by available_nobles[i]: one comparison of the
+            nobles' rows of NOBLE_COST_MATRIX against the player's row of bonus_counts.
+        '''
+        available_nobles = self.return_available_nobles()
+        noble_ids = [noble.noble_id for noble in available_nobles]
+        is_eligible = (NOBLE_COST_MATRIX[noble_ids] <= self.bonus_counts[pid]).all(axis=1)
+        return available_nobles, is_eligible
+
     def noble_visit(self, noble, pid):
-        noble_cost = noble.card_cost
-        non_zero_costs = list(filter(lambda i: i, noble_cost))
-        costs_met = 0
-        for i in range(len(noble_cost)):
-            this_cost = noble_cost[i]
-            this_symbol = NON_JOKER_TOKEN_SYMBOLS[i]
-            player_bonus = self.return_bonus_by_symbol_and_pid(this_symbol, pid)
-            if (player_bonus >= this_cost):
-                costs_met += 1
-        return (costs_met == non_zero_costs)
+        ''' Predicate concerning whether the player with given pid meets every requirement of noble. '''
+        return bool((noble.cost_vector <= self.bonus_counts[pid]).all())
 
 
     def noble_check_actions(self):
-        visitors = []
-        for noble in self.noble_list:
-            if (noble.is_visible):
-                if (noble.cpid == -1):
-                    if self.noble_visit(noble, self.active_player_idx):
-                        visitors.append(noble)
+        '''\
+            The active player is visited by (at most MAX_N_NOBLE_PER_PLY) one of the available
+            nobles whose requirements they meet, choosing which if there are several.
+        '''
+        pid = self.active_player_idx
+        available_nobles, is_eligible = self.noble_eligibility_analysis(pid=pid)
         visit_actions = []
-        for visitor in visitors:
-            visit_action = AttainNoble(ref_noble=visitor,
-                                       ref_pid=self.active_player_idx)
-        if not(visitors):
-            visit_actions.append(NULL_SUBPHASE_ACTION)
+        for noble, noble_is_eligible in zip(available_nobles, is_eligible.tolist()):
+            if noble_is_eligible:
+                visit_actions.append(self.pooled_action(AttainNoble, ref_noble=noble, ref_pid=pid))
+        if not(visit_actions):
+            visit_actions.append(self.null_subphase_action)
 
         return list(visit_actions)
 
@@ -770,58 +1081,48 @@ class GameState(Base):
         refill_actions = []
         # Case: None of the tiers need to refill a card
         if (self.tier_to_refill == -1):
-            refill_actions.append(NULL_SUBPHASE_ACTION)
+            refill_actions.append(self.null_subphase_action)
         else:
             # Case: Tier needs to refill a card, but it's empty.
-            tier_to_refill = self.get_deck_by_tier(self.tier_to_refill)
-            undealt_cards = self.return_undealt_cards(tier_to_refill)
-            if not(undealt_cards):
-                refill_actions.append(NULL_SUBPHASE_ACTION)
+            if not(self.count_deck_cards(self.tier_to_refill)):
+                refill_actions.append(self.null_subphase_action)
             else:
-                refill_actions.append(RefillAction(ref_tier=self.tier_to_refill))
+                refill_actions.append(self.pooled_action(RefillAction, ref_tier=self.tier_to_refill))
         return list(refill_actions)
 
 
     def winner_check_actions(self):
-        return [WinnerCheckAction(ref_pid=self.active_player_idx)]
-
-    def simplify_tokens(self, list_of_tokens, max_n_token):
-        counter = {}
-        for symbol in ALL_TOKEN_SYMBOLS:
-            counter[symbol] = 0
-
-        keepers = []
-        for token in list_of_tokens:
-            n_token_so_far = counter[token.symbol]
-            if (n_token_so_far < max_n_token):
-                counter[token.symbol] += 1
-                keepers.append(token)
-        return list(keepers)
-
+        return [self.pooled_action(WinnerCheckAction, ref_pid=self.active_player_idx)]
 
     def max_n_token_check_actions(self):
+        '''\
+            Return one ReturnTokensAction per distinct multiset of tokens the active player could
+            hand back to get down to MAX_N_TOKEN_PER_PLAYER; see enumerate_discards().
+        '''
         return_extra_token_actions = []
-        active_player_tokens = self.filter_by_pid(self.active_player_idx,
-                                                  self.token_list)
-        n_active_player_tokens = len(active_player_tokens)
+        pid = self.active_player_idx
+        holding = tuple(self.token_counts[pid + 1].tolist())
+        n_active_player_tokens = sum(holding)
 
         # Case: We need to return some tokens.
         if (n_active_player_tokens > MAX_N_TOKEN_PER_PLAYER):
-            token_delta = MAX_N_TOKEN_PER_PLAYER - n_active_player_tokens
-            simplified_tokens = self.simplify_tokens(active_player_tokens, token_delta)
-            token_return_combos = list(combinations(simplified_tokens, token_delta))
-            for combo in token_return_combos:
-                return_extra_token_actions.append(ReturnTokensAction(ref_tokens=combo))
+            token_delta = n_active_player_tokens - MAX_N_TOKEN_PER_PLAYER
+            for discard in enumerate_discards(holding, token_delta):
+                symbols = self.convert_payment_into_symbols(discard)
+                return_extra_token_actions.append(self.pooled_action(ReturnTokensAction, symbols=symbols, actor_pid=pid))
 
         # Case: No tokens to return
         else:
-            return_extra_token_actions.append(NULL_SUBPHASE_ACTION)
+            return_extra_token_actions.append(self.null_subphase_action)
         return list(return_extra_token_actions)
 
 
     def determine_legal_actions(self):
+        # Case: The game has ended.
+        if self.is_game_over:
+            return []
         # Case: Start of a player's ply
-        if (self.subphase == START_PLY):
+        elif (self.subphase == START_PLY):
             return self.determine_legal_actions_()
         # Case: Noble visit check
         elif (self.subphase == NOBLE_CHECK):
@@ -837,15 +1138,203 @@ class GameState(Base):
         elif (self.subphase == WINNER_CHECK):
             return self.winner_check_actions()
 
+    def iterate_legal_actions(self):
+        '''\
+            Generator counterpart of determine_legal_actions(): the Fundamental Actions are
+            built one at a time as they are consumed, so a caller that only wants the first
+            few (or one) doesn't pay for the rest.
+        '''
+        if not(self.is_game_over) and (self.subphase == START_PLY):
+            return self.iterate_legal_actions_()
+        return iter(self.determine_legal_actions())
+
+    def sample_legal_action(self, rng, weights=None):
+        '''\
+            Return one legal action chosen at random, or None once the game is over.
+
+            rng         <Generator>                 Random stream to draw from.
+            weights     <Dict[type, float]>         Relative weight of each action of the given
+                                                    Action class, e.g. {PurchaseCard: 4.0}; classes
+                                                    not listed weigh 1.0. None samples uniformly
+                                                    from determine_legal_actions(), and so do weights
+                                                    giving every available action 0 weight.
+
+            The active player only passes when no Fundamental Action is available, whatever the weights.
+
+            At START_PLY the options are only counted per family (wide draws, double draws,
+            reservations, and purchase contracts); only the chosen action, and for a purchase the
+            chosen payment, is materialized. The payments are only counted, with count_payments(),
+            for the cards determine_purchase_choices() finds affordable, and not at all when the
+            player holds no jokers: each affordable card then has exactly one way to pay.
+        '''
+        if self.is_game_over:
+            return None
+        if (self.subphase != START_PLY):
+            legal_actions = self.determine_legal_actions()
+            return legal_actions[rng.integers(len(legal_actions))]
+
+        pid = self.active_player_idx
+        wd_combos = self.solve_wide_draw_combinations()
+        dd_combos = self.solve_double_draw_combinations()
+        cards_to_reserve = self.return_eligible_cards_to_reserve_by_pid(pid=pid) if self.player_can_reserve_card(pid=pid) else []
+        cards_to_purchase = self.determine_purchase_choices(pid=pid)
+        holding = tuple(self.token_counts[pid + 1].tolist())
+        bonuses = tuple(self.bonus_counts[pid].tolist())
+        # Apparent costs without NumPy, whose call overhead dominates for a handful of cards.
+        costs = [discount_cost(card.cost, bonuses) for card in cards_to_purchase]
+        if holding[JOKER_IDX]:
+            n_payments = [count_payments(cost, holding) for cost in costs]
+        else:
+            n_payments = [1] * len(costs)
+
+        family_classes = (WideDraw, DoubleDraw, ReserveCard, PurchaseCard)
+        family_sizes = (len(wd_combos), len(dd_combos), len(cards_to_reserve), sum(n_payments))
+        family_weights = [n_action * (1.0 if (weights is None) else weights.get(action_class, 1.0))
+                          for action_class, n_action in zip(family_classes, family_sizes)]
+        # Case: No Fundamental Action is available, so the active player passes.
+        if not(sum(family_sizes)):
+            return self.null_subphase_action
+        total_weight = sum(family_weights)
+        # Case: Every available action weighs 0; fall back on sampling them uniformly.
+        if not(total_weight):
+            family_weights = list(family_sizes)
+            total_weight = sum(family_weights)
+
+        # Choose a family in proportion to its total weight, then a member uniformly.
+        # The default guards against rounding carrying the threshold past the last family.
+        family_idx = max(i for i, weight in enumerate(family_weights) if weight)
+        threshold = rng.random() * total_weight
+        for i, weight in enumerate(family_weights):
+            if (threshold < weight):
+                family_idx = i
+                break
+            threshold -= weight
+        member_idx = int(rng.integers(family_sizes[family_idx]))
+
+        # Case: Wide draw
+        if (family_idx == 0):
+            return self.pooled_action(WideDraw, symbols=wd_combos[member_idx], actor_pid=pid)
+        # Case: Double draw
+        elif (family_idx == 1):
+            return self.pooled_action(DoubleDraw, symbols=dd_combos[member_idx], actor_pid=pid)
+        # Case: Reservation
+        elif (family_idx == 2):
+            return self.pooled_action(ReserveCard, ref_card=cards_to_reserve[member_idx], actor_id=pid)
+        # Case: Purchase; find the card, then only materialize the chosen way to pay for it.
+        for card, cost, n_payment in zip(cards_to_purchase, costs, n_payments):
+            if (member_idx < n_payment):
+                way = self.convert_payment_into_symbols(payment_at(cost, holding, member_idx))
+                return self.pooled_action(PurchaseCard, ref_card=card, actor_id=pid, way_to_pay=way)
+            member_idx -= n_payment
+
+
+    def to_bytes(self):
+        '''\
+            Return the canonical encoding of the position, laid out as described by
+            STATE_PREFIX_FORMAT in constants.py. GameState.from_bytes() inverts it exactly.
+        '''
+        fields = [self.n_player,
+                  self.active_player_idx,
+                  self.subphase,
+                  int(self.is_final_turn) | (int(self.is_game_over) << 1),
+                  self.tier_to_refill,
+                  self.n_tokens_drawn_this_ply]
+
+        # A card's visibility isn't stored: owned cards are always face up, and an uncontrolled
+        # one is face up unless it is in the undealt tail of its deck.
+        card_nibbles = []
+        for card in self.card_list:
+            card_nibble = card.cpid + 1
+            if card.is_reserved:
+                card_nibble |= CARD_ENCODING_RESERVED_BIT
+            card_nibbles.append(card_nibble)
+        fields.extend(pack_nibbles(card_nibbles))
+
+        token_counts = self.token_counts.tolist()
+        for owner_row in range(MAX_N_PLAYER + 1):
+            if (owner_row < len(token_counts)):
+                fields.extend(token_counts[owner_row])
+            else:
+                fields.extend([0] * N_TOKEN_SYMBOL)
+
+        fields.extend([noble.noble_id for noble in self.noble_list])
+        noble_nibbles = [0] * MAX_N_NOBLE
+        for noble in self.noble_list:
+            noble_nibbles[noble.noble_id] = noble.cpid + 1
+            if noble.is_visible:
+                noble_nibbles[noble.noble_id] |= NOBLE_ENCODING_VISIBLE_BIT
+        fields.extend(pack_nibbles(noble_nibbles))
+
+        # Only the undealt tail of each deck is position; the cards dealt from it are history.
+        deck_tails = [self.deck_order[tier][self.deck_cursor[tier]:] for tier in range(N_TIER)]
+        fields.extend([len(deck_tail) for deck_tail in deck_tails])
+        return struct.pack(STATE_PREFIX_FORMAT, *fields) + bytes([card_id for deck_tail in deck_tails for card_id in deck_tail])
+
+    @classmethod
+    def from_bytes(cls, data, **kwargs):
+        ''' Construct the GameState encoded by to_bytes(). '''
+        fields = struct.unpack_from(STATE_PREFIX_FORMAT, data)
+        n_player = fields[0]
+        state = cls(n_player=n_player, **kwargs)
+        state.active_player_idx = fields[1]
+        state.subphase = fields[2]
+        state.is_final_turn = bool(fields[3] & 1)
+        state.is_game_over = bool(fields[3] & 2)
+        state.tier_to_refill = fields[4]
+        state.n_tokens_drawn_this_ply = fields[5]
+        offset = len(STATE_HEADER_FORMAT)
+
+        card_nibbles = unpack_nibbles(fields[offset:offset + N_CARD_ENCODING_BYTE], N_CARD)
+        for card in state.card_list:
+            card.cpid = (card_nibbles[card.card_id] & OWNER_ENCODING_MASK) - 1
+            card.is_reserved = bool(card_nibbles[card.card_id] & CARD_ENCODING_RESERVED_BIT)
+        offset += N_CARD_ENCODING_BYTE
+
+        # Tokens of a symbol are interchangeable, so hand them out in token_list order.
+        for owner_row in range(MAX_N_PLAYER + 1):
+            for symbol_idx, symbol in enumerate(ALL_TOKEN_SYMBOLS):
+                n_token = fields[offset + owner_row * N_TOKEN_SYMBOL + symbol_idx]
+                if (owner_row > 0):
+                    unassigned = [token for token in state.token_list if (token.symbol == symbol) and (token.cpid == -1)]
+                    for token in unassigned[:n_token]:
+                        token.cpid = owner_row - 1
+        offset += (MAX_N_PLAYER + 1) * N_TOKEN_SYMBOL
+
+        nobles_by_id = {noble.noble_id: noble for noble in state.noble_list}
+        state.noble_list = [nobles_by_id[noble_id] for noble_id in fields[offset:offset + MAX_N_NOBLE]]
+        offset += MAX_N_NOBLE
+        noble_nibbles = unpack_nibbles(fields[offset:offset + N_NOBLE_ENCODING_BYTE], MAX_N_NOBLE)
+        for noble in state.noble_list:
+            noble.cpid = (noble_nibbles[noble.noble_id] & OWNER_ENCODING_MASK) - 1
+            noble.is_visible = bool(noble_nibbles[noble.noble_id] & NOBLE_ENCODING_VISIBLE_BIT)
+        offset += N_NOBLE_ENCODING_BYTE
+
+        # Each tier deck is rebuilt as the cards already out of it, in card_id order, followed
+        # by its undealt tail, so build_card_index() starts the cursor at the tail.
+        tail_offset = struct.calcsize(STATE_PREFIX_FORMAT)
+        decks = [state.tier_0_cards, state.tier_1_cards, state.tier_2_cards]
+        for tier, deck in enumerate(decks):
+            n_tail = fields[offset + tier]
+            deck_tail = [state.card_list[card_id] for card_id in data[tail_offset:tail_offset + n_tail]]
+            tail_offset += n_tail
+            in_tail = set(card.card_id for card in deck_tail)
+            dealt = sorted((card for card in deck if not(card.card_id in in_tail)), key=lambda card: card.card_id)
+            for card in dealt:
+                card.is_visible = True
+            for card in deck_tail:
+                card.is_visible = False
+            deck[:] = dealt + deck_tail
+
+        state.build_token_bank()
+        state.build_card_index()
+        state.zobrist_hash = compute_zobrist_hash(state)
+        return state
 
     def heartbeat(self):
         pass
 
 
 
-GAMESTATE = GameState(n_player=2)
-X = GAMESTATE
-
 ###########################
 # Actions and Consequents #
 ###########################
@@ -853,75 +1342,106 @@ class Consequent(Base):
     '''\
         Encode an intended change to a specific attribute of a specific reference object.
 
+        state       <GameState>         State the reference object belongs to; the change is
+                                        made through state.set_object_attribute().
         ref_obj     <GameObject>        Object to modify.
         ref_attr    <str>               Attribute of the object to modify.
         new_value   <Any>               The new value to assign to the attribute of the reference object
                                         when this consequent is enacted by its superordinate Action.
     '''
+    __slots__ = ("state", "ref_obj", "ref_attr", "new_value")
+
     def __init__(self,
+                 state,
                  ref_obj,
                  ref_attr,
                  new_value,
                  **kwargs):
+        self.state = state
         self.ref_obj = ref_obj
         self.ref_attr = ref_attr
         self.new_value = new_value
         super().__init__(**kwargs)
 
     def enact(self):
-        setattr(self.ref_obj, self.ref_attr, self.new_value)
+        self.state.set_object_attribute(self.ref_obj, self.ref_attr, self.new_value)
 
 class SubphaseConsequent(Consequent):
-    def __init__(self):
-        pass
+    '''\
+        Advance the subphase of the state. Each GameState owns a single instance,
+        state.advance_subphase_consequent, shared by all of its Actions.
+    '''
+    __slots__ = ()
 
-    def enact(self):
-        GAMESTATE.advance_subphase()
+    def __init__(self, state):
+        self.state = state
 
-ADVANCE_SUBPHASE_CONSEQUENT = SubphaseConsequent()
+    def enact(self):
+        self.state.advance_subphase()
 
 class Action(Base):
     '''\
         Represent a bundle of related modifications to the state.
 
-        antecedents <List[Antecedent]>  Currently unused, but typically encodes preconditions which
+        state       <GameState>         The state the Action was generated from and will modify.
+
+        antecedents <Tuple[Antecedent]> Currently unused, but typically encodes preconditions which
                                         must be verified for this Action to be cleared to enact its
                                         consequents.
 
         consequents <List[Consequent]>  Collection of related intended modifications to the state
                                         enacted 'simultaneously' from the Daemon's PoV when this
-                                        Action is under-taken.
+                                        Action is under-taken. Empty until generate_consequents().
+
+        action_type <str>               Class attribute naming the kind of Action, e.g. for tallying
+                                        actions by kind (see perft.py).
+
+        Actions and Consequents declare __slots__, so they have a fixed layout and no __dict__.
+        Subclasses list their own parameters in __slots__ too.
     '''
+    __slots__ = ("state", "antecedents", "consequents")
+    action_type = "action"
+
     def __init__(self,
-                 antecedents=[],
-                 consequents=[],
+                 state,
+                 antecedents=(),
+                 consequents=(),
                  **kwargs):
-        self.antecedents = list(antecedents)
+        self.state = state
+        self.antecedents = tuple(antecedents)
         self.consequents = list(consequents)
         super().__init__(**kwargs)
 
     def generate_consequents(self):
-        ''' Method to over-ride in subclasses. Transforms parameters into consequents. '''
+        '''\
+            Method to over-ride in subclasses. Transforms parameters into consequents.
+
+            The consequents depend only on the parameters of the Action and the current
+            state. enact_consequents() calls this first, so an Action is a lightweight
+            descriptor until it is enacted, and one retrieved from elsewhere (e.g. a
+            TranspositionTable) is always bound to the state it is enacted on.
+        '''
         pass
 
     def enact_consequents(self):
+        ''' Generate the consequents against the current state, then enact them in order. '''
+        self.generate_consequents()
         for consequent in self.consequents:
             consequent.enact()
 
 class NullSubphaseAction(Action):
-    def __init__(self):
-        self.consequents = []
-
-    def generate_consequents(self):
-        self.consequents = [ADVANCE_SUBPHASE_CONSEQUENT]
-
-    def enact_consequents(self):
-        self.generate_consequents()
-        for consequent in self.consequents:
-            consequent.enact()
+    '''\
+        Daemon action which does nothing but advance the subphase. Each GameState owns
+        a single instance, state.null_subphase_action.
+    '''
+    __slots__ = ()
+    action_type = "pass"
 
-NULL_SUBPHASE_ACTION = NullSubphaseAction()
+    def __init__(self, state):
+        super().__init__(state=state)
 
+    def generate_consequents(self):
+        self.consequents = [self.state.advance_subphase_consequent]
 
 
 class TokenDraw(Action):
@@ -935,6 +1455,9 @@ class TokenDraw(Action):
         actor_pid   <int>
                     used to identify the player who is drawing the tokens.
     '''
+    __slots__ = ("symbols", "actor_pid")
+    action_type = "draw"
+
     def __init__(self,
                  symbols,
                  actor_pid,
@@ -946,17 +1469,20 @@ class TokenDraw(Action):
 
     def generate_consequents(self):
         self.consequents.clear()
-        token_objects_to_draw = GAMESTATE.convert_token_symbol_combination(self.symbols)
+        token_objects_to_draw = self.state.convert_token_symbol_combination(self.symbols)
         for token_object in token_objects_to_draw:
-            self.consequents.append(Consequent(ref_obj=token_object,
+            self.consequents.append(Consequent(state=self.state,
+                                               ref_obj=token_object,
                                                ref_attr='cpid',
                                                new_value=self.actor_pid))
 
         # Add a consequent that allows us to tell the State how many tokens were drawn
         # by the active player this ply, to support token clean up state based action.
-        self.consequents.append(Consequent(ref_obj=GAMESTATE,
+        self.consequents.append(Consequent(state=self.state,
+                                           ref_obj=self.state,
                                            ref_attr='n_tokens_drawn_this_ply',
                                            new_value=len(self.symbols)))
+        self.consequents.append(self.state.advance_subphase_consequent)
 
 
 class WideDraw(TokenDraw):
@@ -964,6 +1490,9 @@ class WideDraw(TokenDraw):
         Represent the Fundamental action of drawing three uncontrolled non-Joker tokens
         of the different colours.
     '''
+    __slots__ = ()
+    action_type = "wide_draw"
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
@@ -972,6 +1501,9 @@ class DoubleDraw(TokenDraw):
         Represents the Fundamental action of drawing two uncontrolled non-Joker tokens
         of the same colour.
     '''
+    __slots__ = ()
+    action_type = "double_draw"
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
@@ -980,6 +1512,9 @@ class ReserveCard(Action):
     '''\
         Represents the action of reserving a development card.
     '''
+    __slots__ = ("ref_card", "actor_id")
+    action_type = "reserve"
+
     def __init__(self,
                  ref_card,
                  actor_id,
@@ -990,20 +1525,47 @@ class ReserveCard(Action):
 
     def generate_consequents(self):
         self.consequents.clear()
-        self.consequents.append(Consequent(ref_obj=self.ref_card,
+        self.consequents.append(Consequent(state=self.state,
+                                           ref_obj=self.ref_card,
                                            ref_attr='is_reserved',
                                            new_value=True))
-        self.consequents.append(Consequent(ref_obj=self.ref_card,
+        self.consequents.append(Consequent(state=self.state,
+                                           ref_obj=self.ref_card,
                                            ref_attr='cpid',
                                            new_value=self.actor_id))
 
+        # This will return either a list of two consequents, one for attaining a joker token,
+        # the other for updating the state that 1 token was drawn this ply. OR;
+        # None, if there are no free joker tokens left.
+        extra_joker_consequents = self.state.determine_joker_reward()
+        if (extra_joker_consequents is not None):
+            self.consequents.extend(extra_joker_consequents)
+
+        # Case: Was this card reserved directly from the top of a deck? The reserver gets to see
+        #       it, but no gap opened in the market.
+        if not(self.ref_card.is_visible):
+            self.consequents.append(Consequent(state=self.state,
+                                               ref_obj=self.ref_card,
+                                               ref_attr="is_visible",
+                                               new_value=True))
+        # Case: It was reserved from the market, whose gap must be refilled.
+        else:
+            self.consequents.append(Consequent(state=self.state,
+                                               ref_obj=self.state,
+                                               ref_attr="tier_to_refill",
+                                               new_value=self.ref_card.tier))
+        self.consequents.append(self.state.advance_subphase_consequent)
+
 class PurchaseCard(Action):
     '''\
         Represents the action of purchasing a development card.
         ref_card    <Card>          card to purchase
         actor_id    <int>           pid of player purchasing card
-        way_to_pay  <List[Token]>   tokens used to pay in this method of payment.
+        way_to_pay  <Tuple[str]>    symbols of the tokens used to pay in this method of payment.
     '''
+    __slots__ = ("ref_card", "actor_id", "way_to_pay")
+    action_type = "purchase"
+
     def __init__(self,
                  ref_card,
                  actor_id,
@@ -1012,7 +1574,7 @@ class PurchaseCard(Action):
         super().__init__(**kwargs)
         self.ref_card = ref_card
         self.actor_id = actor_id
-        self.way_to_pay = list(way_to_pay)
+        self.way_to_pay = tuple(way_to_pay)
 
     def generate_consequents(self):
         self.consequents.clear()
@@ -1020,29 +1582,38 @@ class PurchaseCard(Action):
         # the player who purchased it, since only players who reserved a card
         # can purchase that card.
         # If it isn't reserved, that means it will not have had its cpid matched yet,
-        # and the GAMESTATE will need to try to refill a card from its tier.
+        # and the state will need to try to refill a card from its tier.
         if self.ref_card.is_reserved:
-            self.consequents.append(Consequent(ref_obj=self.ref_card,
+            self.consequents.append(Consequent(state=self.state,
+                                               ref_obj=self.ref_card,
                                                ref_attr='is_reserved',
                                                new_value=False))
         else:
-            self.consequents.append(Consequent(ref_obj=self.ref_card,
+            self.consequents.append(Consequent(state=self.state,
+                                               ref_obj=self.ref_card,
                                                ref_attr='cpid',
                                                new_value=self.actor_id))
-            self.consequents.append(Consequent(ref_obj=GAMESTATE,
+            self.consequents.append(Consequent(state=self.state,
+                                               ref_obj=self.state,
                                                ref_attr='tier_to_refill',
                                                new_value=self.ref_card.tier))
 
         # Send the tokens used to pay back into the communal pool.
-        for payment_token in self.way_to_pay:
-            self.consequents.append(Consequent(ref_obj=payment_token,
+        payment_tokens = self.state.convert_token_symbol_combination(self.way_to_pay, pid=self.actor_id)
+        for payment_token in payment_tokens:
+            self.consequents.append(Consequent(state=self.state,
+                                               ref_obj=payment_token,
                                                ref_attr='cpid',
                                                new_value=-1))
+        self.consequents.append(self.state.advance_subphase_consequent)
 
 class AttainNoble(Action):
     '''\
         Represent the action of choosing a noble to visit you.
     '''
+    __slots__ = ("ref_noble", "ref_pid")
+    action_type = "noble"
+
     def __init__(self, ref_noble, ref_pid, **kwargs):
         super().__init__(**kwargs)
         self.ref_noble = ref_noble
@@ -1050,15 +1621,20 @@ class AttainNoble(Action):
 
     def generate_consequents(self):
         self.consequents.clear()
-        self.consequents.append(Consequent(ref_obj=self.ref_noble,
+        self.consequents.append(Consequent(state=self.state,
+                                           ref_obj=self.ref_noble,
                                            ref_attr='cpid',
                                            new_value=self.ref_pid))
+        self.consequents.append(self.state.advance_subphase_consequent)
 
 class RefillAction(Action):
     '''\
         Represent the action of replacing a development card that has
         been either reserved or purchased.
     '''
+    __slots__ = ("ref_tier",)
+    action_type = "refill"
+
     def __init__(self, ref_tier, **kwargs):
         super().__init__(**kwargs)
         self.ref_tier = ref_tier
@@ -1067,46 +1643,230 @@ class RefillAction(Action):
         pass
 
     def enact_consequents(self):
-        deck_to_deal_from = GAMESTATE.get_deck_by_tier(self.ref_tier)
-        GAMESTATE.deal(deck_to_deal_from)
+        self.state.deal_card(self.ref_tier)
+        self.state.advance_subphase()
 
 
 class WinnerCheckAction(Action):
     '''\
         Daemon action to figure out if we're in the final round or not.
     '''
-    def __init__(self, ref_pid):
+    __slots__ = ("ref_pid",)
+    action_type = "winner_check"
+
+    def __init__(self, ref_pid, **kwargs):
+        super().__init__(**kwargs)
         self.ref_pid = ref_pid
 
     def generate_consequents(self):
-        self.consequents = [ADVANCE_SUBPHASE_CONSEQUENT]
+        self.consequents = [self.state.advance_subphase_consequent]
 
     def enact_consequents(self):
-        victory_tuple = GAMESTATE.tally_victory_points(self.ref_pid)
+        victory_tuple = self.state.tally_victory_points(self.ref_pid)
         if (victory_tuple[0] >= MIN_VP_TO_WIN):
-            GAMESTATE.is_final_turn = True
-        self.generate_consequents()
+            self.state.set_object_attribute(self.state, 'is_final_turn', True)
         super().enact_consequents()
 
 class ReturnTokensAction(Action):
     '''\
-        Represent the action of returning a Token to the communal collection.
+        Represent the action of returning Tokens to the communal collection.
+
+        symbols     <Tuple[str in ALL_TOKEN_SYMBOLS]>   symbols of the Tokens to return, one per Token.
+
+        actor_pid   <int>                               pid of the player returning them.
     '''
-    def __init__(self, ref_tokens):
-        self.ref_tokens = ref_tokens
+    __slots__ = ("symbols", "actor_pid")
+    action_type = "discard"
+
+    def __init__(self, symbols, actor_pid, **kwargs):
+        super().__init__(**kwargs)
+        self.symbols = tuple(symbols)
+        self.actor_pid = actor_pid
 
     def generate_consequents(self):
         self.consequents.clear()
-        for token in self.ref_tokens:
-            self.consequents.append(Consequent(ref_obj=token,
+        tokens_to_return = self.state.convert_token_symbol_combination(self.symbols, pid=self.actor_pid)
+        for token in tokens_to_return:
+            self.consequents.append(Consequent(state=self.state,
+                                               ref_obj=token,
                                                ref_attr="cpid",
                                                new_value=-1))
+        self.consequents.append(self.state.advance_subphase_consequent)
+
+###################
+# Instrumentation #
+###################
+class Instrumentation(Base):
+    '''\
+        Counters and timers for the hot paths of one GameState.
+
+        While enabled, the measured methods of the state are shadowed by instance attributes
+        wrapping the class methods; disabling deletes them again. So a state which is not being
+        instrumented runs exactly the same code as one which never was.
+
+        Measured:
+            determine_legal_actions()   calls, time, and actions generated per subphase, the
+                                        PurchaseCard and ReturnTokensAction counts among them,
+                                        and the position with the largest branching factor.
+            ways_to_pay()               calls and time.
+            brute_force_ways_to_pay()   calls and time.
+            set_object_attribute()      every consequent enacted (daemon actions' included) which
+            advance_subphase()          changed the state, counted per ply. An assignment of the
+                                        value an attribute already has is not counted, and an
+                                        advance of the subphase counts once, however many
+                                        attributes it resets (e.g. refresh_ply_variables()).
+
+        A ply ends when the active player changes. iterate_legal_actions() is not measured.
+
+        state           <GameState>     The instrumented state.
+    '''
+    MEASURED_METHODS = ('determine_legal_actions',
+                        'ways_to_pay',
+                        'brute_force_ways_to_pay',
+                        'set_object_attribute',
+                        'advance_subphase',
+                        'advance_active_player_idx')
+
+    def __init__(self, state, **kwargs):
+        super().__init__(**kwargs)
+        self.state = state
+        self.is_enabled = False
+        self.reset()
+
+    def reset(self):
+        self.subphase_stats = {subphase: {"n_calls": 0, "total_s": 0.0, "n_actions": 0, "max_n_actions": 0}
+                               for subphase in SUBPHASE_NAMES}
+        self.n_purchase_contracts = 0
+        self.n_token_return_combos = 0
+        self.max_branching = None
+        self.payment_stats = {"ways_to_pay": {"n_calls": 0, "total_s": 0.0},
+                              "brute_force_ways_to_pay": {"n_calls": 0, "total_s": 0.0}}
+        self.n_consequents = 0
+        # While positive, attribute changes are part of a consequent counted already.
+        self.n_open_consequents = 0
+        self.n_plies = 0
+        self.n_consequents_this_ply = 0
+        self.max_consequents_per_ply = 0
+
+    def enable(self):
+        if self.is_enabled:
+            return
+        for method_name in self.MEASURED_METHODS:
+            wrapped = getattr(self.state, method_name)
+            setattr(self.state, method_name, getattr(self, "measure_" + method_name)(wrapped))
+        self.is_enabled = True
+
+    def disable(self):
+        if not(self.is_enabled):
+            return
+        for method_name in self.MEASURED_METHODS:
+            delattr(self.state, method_name)
+        self.is_enabled = False
+
+    def measure_determine_legal_actions(self, wrapped):
+        def determine_legal_actions():
+            subphase = self.state.subphase
+            start = perf_counter()
+            legal_actions = wrapped()
+            elapsed = perf_counter() - start
+
+            n_actions = len(legal_actions)
+            stats = self.subphase_stats[subphase]
+            stats["n_calls"] += 1
+            stats["total_s"] += elapsed
+            stats["n_actions"] += n_actions
+            stats["max_n_actions"] = max(stats["max_n_actions"], n_actions)
+            if (subphase == START_PLY):
+                self.n_purchase_contracts += sum(1 for action in legal_actions if isinstance(action, PurchaseCard))
+            elif (subphase == N_TOKEN_CHECK):
+                self.n_token_return_combos += sum(1 for action in legal_actions if isinstance(action, ReturnTokensAction))
+
+            # Keep the encoding of the widest position seen, so that it can be reproduced with
+            # GameState.from_bytes().
+            if (self.max_branching is None) or (n_actions > self.max_branching["n_actions"]):
+                self.max_branching = {"n_actions": n_actions,
+                                      "subphase": SUBPHASE_NAMES[subphase],
+                                      "zobrist_hash": self.state.zobrist_hash,
+                                      "encoding": self.state.to_bytes().hex()}
+            return legal_actions
+        return determine_legal_actions
+
+    def measure_payments(self, wrapped, stats):
+        def measured_payments(ref_card, ref_pid):
+            start = perf_counter()
+            result = wrapped(ref_card=ref_card, ref_pid=ref_pid)
+            stats["total_s"] += perf_counter() - start
+            stats["n_calls"] += 1
+            return result
+        return measured_payments
+
+    def measure_ways_to_pay(self, wrapped):
+        return self.measure_payments(wrapped, self.payment_stats["ways_to_pay"])
+
+    def measure_brute_force_ways_to_pay(self, wrapped):
+        return self.measure_payments(wrapped, self.payment_stats["brute_force_ways_to_pay"])
+
+    def measure_set_object_attribute(self, wrapped):
+        def set_object_attribute(ref_obj, ref_attr, new_value):
+            if not(self.n_open_consequents) and (getattr(ref_obj, ref_attr) != new_value):
+                self.n_consequents += 1
+                self.n_consequents_this_ply += 1
+            wrapped(ref_obj, ref_attr, new_value)
+        return set_object_attribute
+
+    def measure_advance_subphase(self, wrapped):
+        def advance_subphase():
+            # Counted before the ply it may end is closed by advance_active_player_idx().
+            self.n_consequents += 1
+            self.n_consequents_this_ply += 1
+            self.n_open_consequents += 1
+            wrapped()
+            self.n_open_consequents -= 1
+        return advance_subphase
+
+    def measure_advance_active_player_idx(self, wrapped):
+        def advance_active_player_idx():
+            wrapped()
+            self.n_plies += 1
+            self.max_consequents_per_ply = max(self.max_consequents_per_ply, self.n_consequents_this_ply)
+            self.n_consequents_this_ply = 0
+        return advance_active_player_idx
+
+    def snapshot(self):
+        ''' Self-documenting. '''
+        subphases = {}
+        for subphase, stats in self.subphase_stats.items():
+            subphase_snapshot = dict(stats)
+            subphase_snapshot["mean_n_actions"] = stats["n_actions"] / max(1, stats["n_calls"])
+            subphases[SUBPHASE_NAMES[subphase]] = subphase_snapshot
+        return {"subphases": subphases,
+                "n_purchase_contracts": self.n_purchase_contracts,
+                "n_token_return_combos": self.n_token_return_combos,
+                "max_branching": None if (self.max_branching is None) else dict(self.max_branching),
+                "payments": {name: dict(stats) for name, stats in self.payment_stats.items()},
+                "n_consequents": self.n_consequents,
+                "n_plies": self.n_plies,
+                "mean_consequents_per_ply": self.n_consequents / max(1, self.n_plies),
+                "max_consequents_per_ply": self.max_consequents_per_ply}
+
+
+##################
+# Game Factories #
+##################
+# Importing this module only defines things; games are built explicitly.
+def new_game(n_player=2, seed=RNG_SEED):
+    ''' Construct a GameState and deal it into its initial position. '''
+    state = GameState(n_player=n_player, seed=seed)
+    state.arrive_at_initial_state()
+    return state
 
-X.arrive_at_initial_state()
 
-def y():
-    legal = X.determine_legal_actions()
+def y(state):
+    ''' Step state forward by enacting its first legal action, printing what happened. '''
+    legal = state.determine_legal_actions()
     print("Legal Actions: {}".format(legal))
-    print("Current Subphase: {}".format(X.subphase))
-    print("Active Player Idx: {}".format(X.active_player_idx))
+    print("Current Subphase: {}".format(state.subphase))
+    print("Active Player Idx: {}".format(state.active_player_idx))
     legal[0].enact_consequents()
+    if state.is_game_over:
+        state.determine_winner(verbose=True)
@@ -0,0 +1,157 @@
+from collections import OrderedDict
+from state import *
+
+#######################
+# Transposition Table #
+#######################
+class TranspositionEntry(Base):
+    '''\
+        What a TranspositionTable remembers about one position.
+
+        key             <int>               Position key the entry was stored under.
+
+        depth           <int>               Search depth the value was computed to; deeper entries
+                                            are preferred when a bucket needs to evict one.
+
+        legal_actions   <List[Action]>      Result of determine_legal_actions() for the position,
+                                            or None if it hasn't been stored.
+
+        value           <Any>               Value estimate for the position, or None.
+
+        best_action     <Action>            Best move hint for the position, or None.
+    '''
+    def __init__(self,
+                 key,
+                 depth=0,
+                 legal_actions=None,
+                 value=None,
+                 best_action=None,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.key = key
+        self.depth = depth
+        self.legal_actions = legal_actions
+        self.value = value
+        self.best_action = best_action
+
+
+class TranspositionTable(Base):
+    '''\
+        Bounded cache of TranspositionEntry objects for the positions of a single GameState.
+
+        Positions are keyed by the state's zobrist_hash, so the same position reached through
+        different move orders shares one entry. Cached legal actions refer to the game objects
+        of the state the table was built around, so a table must not be shared between states.
+
+        state           <GameState>     The state whose positions are cached.
+
+        max_entries     <int>           Memory cap; the table never holds more entries than this.
+
+        bucket_size     <int>           Entries are split into max_entries // bucket_size buckets
+                                        by key. When a new key arrives at a full bucket, the entry
+                                        with the lowest depth is evicted, and among those the least
+                                        recently used.
+    '''
+    def __init__(self,
+                 state,
+                 max_entries=2**16,
+                 bucket_size=4,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.state = state
+        self.bucket_size = bucket_size
+        self.n_bucket = max(1, max_entries // bucket_size)
+        self.buckets = [OrderedDict() for i in range(self.n_bucket)]
+
+        self.n_entries = 0
+        self.n_hits = 0
+        self.n_misses = 0
+        self.n_evictions = 0
+
+    def position_key(self):
+        ''' Key of the current position of the state. '''
+        return self.state.zobrist_hash
+
+    def return_bucket(self, key):
+        return self.buckets[key % self.n_bucket]
+
+    def probe(self):
+        ''' Return the entry for the current position, or None. '''
+        key = self.position_key()
+        bucket = self.return_bucket(key)
+        entry = bucket.get(key)
+        if (entry is None):
+            self.n_misses += 1
+        else:
+            self.n_hits += 1
+            bucket.move_to_end(key)
+        return entry
+
+    def evict(self, bucket):
+        min_depth = min(entry.depth for entry in bucket.values())
+        # Buckets iterate from least to most recently used.
+        for key, entry in bucket.items():
+            if (entry.depth == min_depth):
+                del bucket[key]
+                self.n_entries -= 1
+                self.n_evictions += 1
+                return
+
+    def store(self, depth=0, legal_actions=None, value=None, best_action=None):
+        '''\
+            Record information about the current position, merging it into the existing entry
+            if there is one. Returns the entry.
+
+            A value and best_action are searched to the given depth: they replace those already
+            held only if that depth is at least the entry's, which then takes it on.
+            legal_actions don't depend on depth and are stored whatever it is.
+        '''
+        key = self.position_key()
+        bucket = self.return_bucket(key)
+        entry = bucket.get(key)
+        if (entry is None):
+            if (len(bucket) >= self.bucket_size):
+                self.evict(bucket)
+            entry = TranspositionEntry(key=key, depth=depth)
+            bucket[key] = entry
+            self.n_entries += 1
+        else:
+            bucket.move_to_end(key)
+
+        if (legal_actions is not None):
+            entry.legal_actions = list(legal_actions)
+        # Case: A search result at least as deep as the one held (if any); a shallower one is dropped.
+        has_result = (entry.value is not None) or (entry.best_action is not None)
+        if ((value is not None) or (best_action is not None)) and (not(has_result) or (depth >= entry.depth)):
+            entry.depth = depth
+            if (value is not None):
+                entry.value = value
+            if (best_action is not None):
+                entry.best_action = best_action
+        return entry
+
+    def determine_legal_actions(self):
+        '''\
+            Drop-in for state.determine_legal_actions() which only computes the legal actions
+            of a position the first time it is reached.
+        '''
+        entry = self.probe()
+        # Actions generate their consequents when enacted, so cached ones remain valid even
+        # when the position was reached holding different (but interchangeable) Token objects.
+        if (entry is not None) and (entry.legal_actions is not None):
+            return list(entry.legal_actions)
+        legal_actions = self.state.determine_legal_actions()
+        self.store(legal_actions=legal_actions)
+        return legal_actions
+
+    def clear(self):
+        for bucket in self.buckets:
+            bucket.clear()
+        self.n_entries = 0
+
+    def snapshot(self):
+        ''' Self-documenting. '''
+        return {"n_entries": self.n_entries,
+                "n_hits": self.n_hits,
+                "n_misses": self.n_misses,
+                "n_evictions": self.n_evictions}
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 I = {}
 I[1] = [(1,0), (0,1)]
 I[2] = [(2,0), (0,2), (1,1)]
@@ -29,3 +31,124 @@ def constrained_partition_dict(max_0, max_1):
     return dict(list(new_src.items()))
 
 
+
+
+def gem_joker_splits(n_cost, max_gem, max_joker):
+    '''\
+        Return the (n_gem, n_joker) pairs summing to n_cost with n_gem <= max_gem and
+        n_joker <= max_joker, spending the fewest jokers first.
+    '''
+    min_joker = max(0, n_cost - max_gem)
+    return [(n_cost - n_joker, n_joker) for n_joker in range(min_joker, min(n_cost, max_joker) + 1)]
+
+@lru_cache(maxsize=4096)
+def enumerate_payments(cost, holding):
+    '''\
+        Return every distinct way of paying cost out of holding, each exactly once.
+
+        cost        <Tuple[int]>    Number of gems owed per colour.
+        holding     <Tuple[int]>    Number of tokens held per colour, with one extra
+                                    trailing entry for the jokers.
+
+        Each way to pay is a tuple laid out like holding: how many tokens of each colour
+        are handed over, jokers last. The shortfall of each colour is covered by jokers,
+        so a colour owing n can be paid with any split in gem_joker_splits(n, ...).
+    '''
+    n_colour = len(cost)
+    result = []
+    payment = [0] * (n_colour + 1)
+
+    def split_colour(colour_idx, n_joker_left):
+        # Case: Every colour has been paid for.
+        if (colour_idx == n_colour):
+            payment[n_colour] = holding[n_colour] - n_joker_left
+            result.append(tuple(payment))
+            return
+        for n_gem, n_joker in gem_joker_splits(cost[colour_idx], holding[colour_idx], n_joker_left):
+            payment[colour_idx] = n_gem
+            split_colour(colour_idx + 1, n_joker_left - n_joker)
+
+    split_colour(0, holding[n_colour])
+    return tuple(result)
+
+@lru_cache(maxsize=8192)
+def discount_cost(cost, bonuses):
+    ''' Return cost less bonuses, per colour and never below 0, i.e. the apparent cost of a card. '''
+    return tuple([(n_cost - n_bonus) if (n_cost > n_bonus) else 0 for n_cost, n_bonus in zip(cost, bonuses)])
+
+# Sized so the counts of one game's worth of purchases, and the suffix counts payment_at()
+# looks up, stay cached; entries are a pair of small tuples and an int.
+@lru_cache(maxsize=2**16)
+def count_payments(cost, holding):
+    '''\
+        Return len(enumerate_payments(cost, holding)) without enumerating the payments, by
+        counting the ways of paying the colours so far per number of jokers left over.
+    '''
+    n_joker = holding[-1]
+    n_ways = [0] * (n_joker + 1)
+    n_ways[n_joker] = 1
+    for colour_idx in range(len(cost)):
+        next_n_ways = [0] * (n_joker + 1)
+        for n_joker_left in range(n_joker + 1):
+            if n_ways[n_joker_left]:
+                for n_gem, n_joker_spent in gem_joker_splits(cost[colour_idx], holding[colour_idx], n_joker_left):
+                    next_n_ways[n_joker_left - n_joker_spent] += n_ways[n_joker_left]
+        n_ways = next_n_ways
+    return sum(n_ways)
+
+def payment_at(cost, holding, index):
+    '''\
+        Return enumerate_payments(cost, holding)[index] without enumerating the other payments:
+        at each colour, skip over the splits whose payments all come before index.
+    '''
+    n_colour = len(cost)
+    # Case: Without jokers the only payment is the cost itself.
+    if not(holding[n_colour]):
+        if (index != 0) or any(n_cost > n_held for n_cost, n_held in zip(cost, holding)):
+            raise IndexError("payment index out of range")
+        return tuple(cost) + (0,)
+    payment = [0] * (n_colour + 1)
+    n_joker_left = holding[n_colour]
+    for colour_idx in range(n_colour):
+        for n_gem, n_joker_spent in gem_joker_splits(cost[colour_idx], holding[colour_idx], n_joker_left):
+            # Payments of the remaining colours, given this split of the current one.
+            n_completions = count_payments(cost[colour_idx + 1:], holding[colour_idx + 1:n_colour] + (n_joker_left - n_joker_spent,))
+            if (index < n_completions):
+                payment[colour_idx] = n_gem
+                n_joker_left -= n_joker_spent
+                break
+            index -= n_completions
+        else:
+            raise IndexError("payment index out of range")
+    payment[n_colour] = holding[n_colour] - n_joker_left
+    return tuple(payment)
+
+@lru_cache(maxsize=4096)
+def enumerate_discards(holding, n_discard):
+    '''\
+        Return every distinct way of handing back n_discard tokens out of holding, each exactly
+        once, as tuples of counts laid out like holding. Tokens of one colour are interchangeable,
+        so e.g. returning one of three diamonds is a single choice, not three.
+    '''
+    n_colour = len(holding)
+    # n_after[i] is how many tokens the colours from i onwards hold between them.
+    n_after = [0] * (n_colour + 1)
+    for colour_idx in range(n_colour - 1, -1, -1):
+        n_after[colour_idx] = n_after[colour_idx + 1] + holding[colour_idx]
+    result = []
+    discard = [0] * n_colour
+
+    def split_colour(colour_idx, n_left):
+        # Case: Every colour has been decided on.
+        if (colour_idx == n_colour):
+            result.append(tuple(discard))
+            return
+        # The later colours must be able to cover whatever this one doesn't.
+        min_n = max(0, n_left - n_after[colour_idx + 1])
+        for n_token in range(min(holding[colour_idx], n_left), min_n - 1, -1):
+            discard[colour_idx] = n_token
+            split_colour(colour_idx + 1, n_left - n_token)
+
+    if (n_discard <= n_after[0]):
+        split_colour(0, n_discard)
+    return tuple(result)
@@ -0,0 +1,86 @@
+from functools import lru_cache
+from constants import *
+
+#############################################
+# Zobrist keys for hashing a GameState      #
+#############################################
+# A position hashes to the XOR of one key per feature of the state. Each key is a
+# fixed pseudo-random 64-bit integer, so the hash of a given position is stable
+# across processes, and changing a feature only requires XORing out the key of
+# its old value and XORing in the key of its new value.
+ZOBRIST_SEED = 271828
+
+# Owners are indexed by (cpid + 1), i.e. index 0 is 'uncontrolled'.
+N_OWNER = MAX_N_PLAYER + 1
+
+# Scalar attributes of the GameState which participate in the hash, mapped to
+# (n_values, offset) such that the key of a value is at index (value + offset).
+HASHED_STATE_ATTRS = {
+    'active_player_idx': (MAX_N_PLAYER, 0),
+    'subphase': (WINNER_CHECK + 1, 0),
+    'is_final_turn': (2, 0),
+    'is_game_over': (2, 0),
+    'tier_to_refill': (N_TIER + 1, 1),
+    'n_tokens_drawn_this_ply': (N_TOKEN_PER_WIDE_DRAW + 1, 0),
+}
+
+ZobristKeys = namedtuple("ZobristKeys", ("card_keys", "noble_keys", "token_count_keys", "state_attribute_keys"))
+
+
+def generate_zobrist_keys(rng, shape):
+    return rng.integers(0, 2**64, size=shape, dtype=np.uint64).tolist()
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys():
+    '''\
+        Build the key tables the first time they are needed, rather than on import. They are
+        generated from ZOBRIST_SEED, so every process builds the same ones.
+
+        card_keys               card_keys[card_id][cpid + 1][is_reserved][is_visible]
+        noble_keys              noble_keys[noble_id][cpid + 1][is_visible]
+        token_count_keys        token_count_keys[cpid + 1][TOKEN_SYMBOL_IDX[symbol]][n_token]
+        state_attribute_keys    state_attribute_keys[attr][value + offset], see HASHED_STATE_ATTRS
+    '''
+    rng = np.random.default_rng(ZOBRIST_SEED)
+    card_keys = generate_zobrist_keys(rng, (N_CARD, N_OWNER, 2, 2))
+    noble_keys = generate_zobrist_keys(rng, (MAX_N_NOBLE, N_OWNER, 2))
+    token_count_keys = generate_zobrist_keys(rng, (N_OWNER, N_TOKEN_SYMBOL, MAX_N_TOKEN + 1))
+    state_attribute_keys = {attr: generate_zobrist_keys(rng, n_values)
+                            for attr, (n_values, offset) in HASHED_STATE_ATTRS.items()}
+    return ZobristKeys(card_keys, noble_keys, token_count_keys, state_attribute_keys)
+
+
+def card_key(card):
+    return zobrist_keys().card_keys[card.card_id][card.cpid + 1][card.is_reserved][card.is_visible]
+
+
+def noble_key(noble):
+    return zobrist_keys().noble_keys[noble.noble_id][noble.cpid + 1][noble.is_visible]
+
+
+def token_count_key(owner_row, symbol_idx, n_token):
+    return zobrist_keys().token_count_keys[owner_row][symbol_idx][n_token]
+
+
+def state_attribute_key(attr, value):
+    offset = HASHED_STATE_ATTRS[attr][1]
+    return zobrist_keys().state_attribute_keys[attr][int(value) + offset]
+
+
+def compute_zobrist_hash(state):
+    '''\
+        Compute the hash of state from scratch. GameState maintains the same value
+        incrementally in state.zobrist_hash; this is the reference it is kept equal to.
+    '''
+    result = 0
+    for card in state.card_list:
+        result ^= card_key(card)
+    for noble in state.noble_list:
+        result ^= noble_key(noble)
+    for owner_row, row_counts in enumerate(state.token_counts.tolist()):
+        for symbol_idx, n_token in enumerate(row_counts):
+            result ^= token_count_key(owner_row, symbol_idx, n_token)
+    for attr in HASHED_STATE_ATTRS:
+        result ^= state_attribute_key(attr, getattr(state, attr))
+    return result